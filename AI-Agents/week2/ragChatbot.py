@@ -3,6 +3,8 @@ from sentence_transformers import SentenceTransformer
 import faiss
 import numpy as np
 import os
+from shared.embedding_cache import cached_encode
+from shared.chunking import chunk_text
 
 def load_and_chunk_document(file_path):
 
@@ -15,17 +17,15 @@ def load_and_chunk_document(file_path):
     if not text.strip():
         raise ValueError("The document is empty or contains only whitespace.")
 
-    # Split by paragraphs (double newlines), as generally paragraphs are separated by a line break
-    chunks = text.split('\n\n')
-    # Clean and filter chunks
-    chunks = [chunk.strip() for chunk in chunks if len(chunk.strip()) > 10]
+    # Paragraphs packed into token-bounded, overlapping windows (see shared/chunking.py)
+    chunks = chunk_text(text)
     return chunks
 
 def generate_embeddings(chunks):
     # Load the embedding model
     embedder = SentenceTransformer('all-MiniLM-L6-v2')
-    # Generate embeddings (returns a list of numpy arrays)
-    embeddings = embedder.encode(chunks, convert_to_numpy=True)
+    # Generate embeddings (cached on disk, keyed by chunk text + model name)
+    embeddings = cached_encode(embedder, chunks, 'all-MiniLM-L6-v2')
     return embeddings , embedder
 
 def create_faiss_index(embeddings):
@@ -5,6 +5,7 @@ import faiss
 import numpy as np
 from tools import search_tavily, search_wikipedia, calculate
 import os
+from shared.chunking import chunk_text
 
 
 
@@ -34,8 +35,7 @@ def load_and_chunk_document(file_path):
     if not text.strip():
         raise ValueError("The document is empty or contains only whitespace.")
 
-    chunks = text.split('\n\n')
-    chunks = [chunk.strip() for chunk in chunks if len(chunk.strip()) > 10]
+    chunks = chunk_text(text)  # token-bounded windows with overlap, each knows its token count
     return chunks
 
 def generate_embeddings(chunks):
@@ -1,35 +1,36 @@
-import json
 import os
 import requests
 from datetime import datetime
 from shared.newOpenAI import openai
+from shared.history_journal import HistoryJournal
 import dotenv
 dotenv.load_dotenv()
 
 API_URL = os.getenv("PROXY_URL")
 
-HISTORY_FILE = "conversation_history.json"
+HISTORY_FILE = "conversation_history.jsonl"          # append-only journal, one message per line
+LEGACY_HISTORY_FILE = "conversation_history.json"    # old format, migrated on first load
 conversation_history = []
 entities = {}
 MAX_TOKENS = 3000
 
+journal = HistoryJournal(HISTORY_FILE, legacy_json=LEGACY_HISTORY_FILE)
+
 def load_history():
-    global conversation_history
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, 'r') as f:
-            conversation_history = json.load(f)
+    conversation_history[:] = journal.load()
 
 def save_history():
-    with open(HISTORY_FILE, 'w') as f:
-        json.dump(conversation_history, f, indent=2)
+    # full rewrite (compaction); add_to_history only appends
+    journal.compact(conversation_history)
 
 def add_to_history(role, content):
-    conversation_history.append({
+    message = {
         "role": role,
         "content": content,
         "timestamp": datetime.now().isoformat()
-    })
-    save_history()
+    }
+    conversation_history.append(message)
+    journal.append(message)
 
 def estimate_tokens(text):
     return len(text) // 4
@@ -0,0 +1 @@
+"""Offline benchmarks for the Study Buddy RAG pipeline (run with `python -m benchmarks.<name>`)."""
@@ -0,0 +1,48 @@
+"""
+Encoding throughput vs. number of worker processes.
+
+Encodes the same synthetic corpus with `shared.bulk_encode` at 1, 2, 4, …
+workers and reports chunks/s and the speed-up over one process, to check
+that bulk ingestion scales with core count.
+
+Usage (from the repo root):
+
+    python -m benchmarks.encode_bench                       # 20k paragraphs
+    python -m benchmarks.encode_bench --paragraphs 100000 --workers 1 2 4 8
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+
+from benchmarks.synthetic import generate_paragraphs
+from shared import bulk_encode as bulk
+from shared.model_registry import DEFAULT_MODEL
+
+
+def main() -> None:
+    cpus = os.cpu_count() or 1
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paragraphs", type=int, default=20_000)
+    parser.add_argument("--workers", type=int, nargs="+",
+                        default=[w for w in (1, 2, 4, 8, 16) if w <= cpus])
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    args = parser.parse_args()
+
+    texts = generate_paragraphs(args.paragraphs)
+    rows = []
+    for workers in args.workers:
+        bulk.bulk_encode(texts, args.model, workers=workers)
+        rows.append(dict(bulk.last_stats))
+
+    base = rows[0]["chunks_per_s"]
+    print(f"\n{len(texts)} chunks, {cpus} CPU(s)\n")
+    print(f"{'workers':>8}{'seconds':>10}{'chunks/s':>10}{'speed-up':>10}")
+    for row in rows:
+        print(f"{row['workers']:>8}{row['seconds']:>10.1f}{row['chunks_per_s']:>10.0f}"
+              f"{row['chunks_per_s'] / base:>9.2f}×")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Relevant-history lookup: full keyword-overlap scan vs. postings index.
+
+Builds histories of 1k / 10k / 100k synthetic messages and times, per query,
+the original `get_relevant_history` scan (re-tokenizes every message) and
+`shared.history_index.OverlapIndex.search`, checking both return the same
+messages.
+
+Usage (from the repo root):
+
+    python -m benchmarks.history_bench
+    python -m benchmarks.history_bench --sizes 1000 10000 100000 --queries 200
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import time
+
+from benchmarks.synthetic import generate_paragraphs, generate_queries
+from shared.history_index import OverlapIndex
+
+
+def scan_relevant(history: list[dict], query: str, max_messages: int) -> list[dict]:
+    """The pre-index implementation from studyBuddy/week4/state_management.py."""
+    query_words = set(query.lower().split())
+    scored: list[tuple[int, dict]] = []
+    for msg in history:
+        overlap = len(query_words & set(msg["content"].lower().split()))
+        if overlap > 0:
+            scored.append((overlap, msg))
+    scored.sort(key=lambda x: x[0], reverse=True)
+    return [msg for _, msg in scored[:max_messages]]
+
+
+def synthetic_history(n: int, seed: int = 0) -> list[dict]:
+    rng = random.Random(seed)
+    sentences = [s.strip() + "." for p in generate_paragraphs(max(1, n // 3), seed)
+                 for s in p.split(".") if s.strip()]
+    return [{"role": rng.choice(("user", "assistant")), "content": sentences[i % len(sentences)]}
+            for i in range(n)]
+
+
+def bench(n: int, n_queries: int, k: int) -> dict:
+    history = synthetic_history(n)
+    queries = generate_queries(generate_paragraphs(200, seed=7), n_queries)
+
+    start = time.perf_counter()
+    index = OverlapIndex(history)
+    build_s = time.perf_counter() - start
+
+    scan_t = index_t = 0.0
+    agree = 0
+    for q in queries:
+        start = time.perf_counter()
+        expected = scan_relevant(history, q, k)
+        scan_t += time.perf_counter() - start
+        start = time.perf_counter()
+        found = index.search(q, k)
+        index_t += time.perf_counter() - start
+        agree += [id(m) for m in found] == [id(m) for m in expected]
+
+    return {
+        "messages": n,
+        "build_s": build_s,
+        "scan_ms": scan_t / len(queries) * 1000,
+        "index_ms": index_t / len(queries) * 1000,
+        "agree": agree / len(queries),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"{'messages':>10}{'build s':>10}{'scan ms':>10}{'index ms':>10}{'speed-up':>10}{'same':>7}")
+    for n in args.sizes:
+        r = bench(n, args.queries, args.k)
+        print(f"{r['messages']:>10}{r['build_s']:>10.2f}{r['scan_ms']:>10.2f}{r['index_ms']:>10.3f}"
+              f"{r['scan_ms'] / r['index_ms']:>9.0f}×{r['agree']:>7.0%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,107 @@
+"""
+Memory vs. recall of quantized embedding storage.
+
+Compares the current exact `IndexFlatL2` with float16 / int8 scalar-quantized
+indexes (with and without exact re-rank) on the same vectors and reports
+
+    • index size (serialized bytes ≈ RAM) and the saving vs. flat
+    • recall@k against exact flat search
+    • mean query latency
+
+Usage (from the repo root):
+
+    python -m benchmarks.quantization_bench                    # synthetic vectors
+    python -m benchmarks.quantization_bench --n 200000 --k 10
+    python -m benchmarks.quantization_bench --notes studyBuddy/week4/notes/my_note.md
+"""
+
+from __future__ import annotations
+
+import argparse
+import time
+
+import faiss
+import numpy as np
+
+from shared.ann_index import build_index, index_nbytes
+
+CONFIGS = [
+    ("flat", 0),
+    ("sq_fp16", 0),
+    ("sq_int8", 0),
+    ("sq_int8", 4),
+]
+
+
+def synthetic_embeddings(n: int, dim: int = 384, clusters: int = 64, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors – closer to sentence embeddings than pure noise."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((clusters, dim)).astype(np.float32)
+    vecs = centers[rng.integers(0, clusters, n)] + 0.35 * rng.standard_normal((n, dim)).astype(np.float32)
+    vecs /= np.linalg.norm(vecs, axis=1, keepdims=True)
+    return vecs
+
+
+def notes_embeddings(path: str) -> np.ndarray:
+    from shared.chunking import chunk_text
+    from shared.embedding_cache import cached_encode
+    from shared.model_registry import get_sentence_model, DEFAULT_MODEL
+
+    with open(path, "r", encoding="utf-8") as f:
+        chunks = chunk_text(f.read())
+    return cached_encode(get_sentence_model(DEFAULT_MODEL), chunks, DEFAULT_MODEL)
+
+
+def recall_at_k(found: np.ndarray, truth: np.ndarray) -> float:
+    hits = sum(len(set(f) & set(t)) for f, t in zip(found, truth))
+    return hits / truth.size
+
+
+def run(vectors: np.ndarray, queries: np.ndarray, k: int) -> list[dict]:
+    exact = faiss.IndexFlatL2(vectors.shape[1])
+    exact.add(vectors)
+    _, truth = exact.search(queries, k)
+    flat_bytes = index_nbytes(exact)
+
+    rows = []
+    for backend, rerank in CONFIGS:
+        index = build_index(vectors, backend, rerank=rerank)
+        start = time.perf_counter()
+        _, found = index.search(queries, k)
+        elapsed = time.perf_counter() - start
+        size = index_nbytes(index)
+        rows.append({
+            "index": backend + (f"+rerank×{rerank}" if rerank else ""),
+            "mb": size / 2**20,
+            "saved": 1 - size / flat_bytes,
+            "recall": recall_at_k(found, truth),
+            "ms_per_query": 1000 * elapsed / len(queries),
+        })
+    return rows
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=50_000, help="synthetic corpus size")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=500)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--notes", help="embed this notes file instead of synthetic vectors")
+    args = parser.parse_args()
+
+    vectors = notes_embeddings(args.notes) if args.notes else synthetic_embeddings(args.n, args.dim)
+    rng = np.random.default_rng(1)
+    # queries: perturbed corpus vectors, so every query has real neighbours
+    picks = rng.integers(0, len(vectors), min(args.queries, len(vectors)))
+    queries = vectors[picks] + 0.05 * rng.standard_normal((len(picks), vectors.shape[1])).astype(np.float32)
+    k = min(args.k, len(vectors))
+
+    print(f"\n{len(vectors)} vectors × {vectors.shape[1]} dims, {len(queries)} queries, recall@{k}\n")
+    print(f"{'index':<20}{'size MB':>10}{'saved':>9}{'recall':>9}{'ms/query':>10}")
+    for row in run(vectors, queries, k):
+        print(f"{row['index']:<20}{row['mb']:>10.1f}{row['saved']:>9.0%}"
+              f"{row['recall']:>9.3f}{row['ms_per_query']:>10.3f}")
+
+
+if __name__ == "__main__":
+    main()
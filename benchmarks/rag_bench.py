@@ -0,0 +1,207 @@
+"""
+End-to-end benchmark of the Study Buddy RAG pipeline on synthetic corpora.
+
+For each corpus size it runs the *existing* week4 functions
+
+    load_and_chunk_document → generate_embeddings → create_faiss_index → retrieve_chunks
+
+and the Chroma path from studyBuddy/week2/Assignment2.2/chromaDB_chatbot.py
+(upsert_chunks – the batched encode + upsert that sync_chroma_index runs
+for new PDFs – → retrieve_chunks), and reports
+
+    • chunking / encoding / index-build throughput
+    • p50 / p99 single-query latency
+    • recall@k against exact IndexFlatL2 search
+    • peak RSS of the process after each stage
+
+Usage (from the repo root):
+
+    python -m benchmarks.rag_bench                          # 1k and 10k paragraphs
+    python -m benchmarks.rag_bench --sizes 1000 10000 100000 --k 5
+    python -m benchmarks.rag_bench --skip-chroma --json results.json
+
+Runs offline: HF_HUB_OFFLINE is set, so all-MiniLM-L6-v2 must already be in
+the local Hugging Face cache (run any chatbot once, or pass --online). The
+embedding disk cache is pointed at a temp dir so encoding is really
+measured; pass --warm-cache to measure a warm restart instead.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib.util
+import json
+import os
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+try:
+    import resource
+except ImportError:          # Windows
+    resource = None
+
+REPO = Path(__file__).resolve().parent.parent
+WEEK4_DIR = REPO / "studyBuddy" / "week4"
+CHROMA_BOT = REPO / "studyBuddy" / "week2" / "Assignment2.2" / "chromaDB_chatbot.py"
+
+
+def peak_rss_mb() -> float | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 if sys.platform != "darwin" else peak / 2**20   # KB on Linux, bytes on macOS
+
+
+def _load_module(path: Path, name: str, search_dir: Path | None = None):
+    """Import a chatbot script by path (its folders are not packages)."""
+    if search_dir is not None and str(search_dir) not in sys.path:
+        sys.path.insert(0, str(search_dir))      # for its sibling imports
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def _percentiles(latencies: list[float]) -> tuple[float, float]:
+    import numpy as np
+
+    arr = np.asarray(latencies) * 1000
+    return float(np.percentile(arr, 50)), float(np.percentile(arr, 99))
+
+
+def _recall(found: list[set], truth: list[set]) -> float:
+    total = sum(len(t) for t in truth)
+    return sum(len(f & t) for f, t in zip(found, truth)) / total if total else 1.0
+
+
+def bench_size(n_paragraphs: int, n_queries: int, k: int, chatbot, chroma_bot, workdir: Path) -> dict:
+    import faiss
+    from benchmarks.synthetic import generate_queries, write_corpus
+
+    row: dict = {"paragraphs": n_paragraphs}
+    notes = workdir / f"notes_{n_paragraphs}.md"
+    paragraphs = write_corpus(str(notes), n_paragraphs)
+    queries = generate_queries(paragraphs, n_queries)
+
+    # 1. chunking
+    start = time.perf_counter()
+    chunks = chatbot.load_and_chunk_document(str(notes))
+    elapsed = time.perf_counter() - start
+    row.update(chunks=len(chunks), chunk_per_s=len(chunks) / elapsed)
+
+    # 2. encoding
+    start = time.perf_counter()
+    embeddings, embedder = chatbot.generate_embeddings(chunks)
+    elapsed = time.perf_counter() - start
+    row.update(encode_per_s=len(chunks) / elapsed, rss_after_encode_mb=peak_rss_mb())
+
+    # 3. index build
+    start = time.perf_counter()
+    index = chatbot.create_faiss_index(embeddings)
+    elapsed = time.perf_counter() - start
+    row.update(build_s=elapsed, rss_after_build_mb=peak_rss_mb())
+
+    # ground truth: exact search over the same vectors
+    exact = faiss.IndexFlatL2(embeddings.shape[1])
+    exact.add(embeddings)
+    query_vecs = embedder.encode(queries, convert_to_numpy=True)
+    _, truth_ids = exact.search(query_vecs, k)
+    truth_ids = [set(int(i) for i in row_ids if i != -1) for row_ids in truth_ids]
+    truth_texts = [{chunks[i] for i in ids} for ids in truth_ids]
+
+    # 4. FAISS query path (distinct queries → no cache hits)
+    latencies = []
+    for q in queries:
+        start = time.perf_counter()
+        chatbot.retrieve_chunks(q, embedder, index, chunks, k)
+        latencies.append(time.perf_counter() - start)
+    _, found_ids = index.search(query_vecs, k)
+    row["faiss_p50_ms"], row["faiss_p99_ms"] = _percentiles(latencies)
+    row["faiss_recall"] = _recall([set(int(i) for i in r if i != -1) for r in found_ids], truth_ids)
+    row["rss_after_faiss_mb"] = peak_rss_mb()
+
+    # 5. Chroma path
+    if chroma_bot is not None:
+        from chromadb import PersistentClient
+
+        client = PersistentClient(path=str(workdir / f"chroma_{n_paragraphs}"))
+        collection = client.get_or_create_collection("pdf_index")
+        # same record shape _extract_pdf_chunks produces for a PDF
+        records = [
+            {"id": f"{notes.stem}-c{i}", "content": str(chunk),
+             "metadata": {"source": notes.name, "page": 1, "path": str(notes)}}
+            for i, chunk in enumerate(chunks)
+        ]
+        start = time.perf_counter()
+        chroma_bot.upsert_chunks(records, embedder, collection,
+                                 chroma_bot._upsert_batch_size(client, chroma_bot.EMBED_BATCH_SIZE))
+        row["chroma_build_s"] = time.perf_counter() - start   # encode + batched upserts
+
+        latencies, found = [], []
+        for q in queries:
+            start = time.perf_counter()
+            docs, _ = chroma_bot.retrieve_chunks(q, embedder, collection, k)
+            latencies.append(time.perf_counter() - start)
+            found.append(set(docs))
+        row["chroma_p50_ms"], row["chroma_p99_ms"] = _percentiles(latencies)
+        row["chroma_recall"] = _recall(found, [set(map(str, t)) for t in truth_texts])
+        row["rss_after_chroma_mb"] = peak_rss_mb()
+
+    return row
+
+
+def _fmt(value, spec: str) -> str:
+    return "—" if value is None else format(value, spec)
+
+
+def print_report(rows: list[dict], k: int) -> None:
+    print(f"\n{'paras':>8}{'chunks':>8}{'chunk/s':>10}{'enc/s':>9}{'build s':>9}"
+          f"{'p50 ms':>9}{'p99 ms':>9}{f'R@{k}':>7}{'chroma p50':>12}{'p99':>8}{f'R@{k}':>7}{'RSS MB':>9}")
+    for r in rows:
+        rss = max((v for key, v in r.items() if key.startswith("rss_") and v), default=None)
+        print(f"{r['paragraphs']:>8}{r['chunks']:>8}{r['chunk_per_s']:>10.0f}{r['encode_per_s']:>9.0f}"
+              f"{r['build_s']:>9.2f}{r['faiss_p50_ms']:>9.2f}{r['faiss_p99_ms']:>9.2f}"
+              f"{r['faiss_recall']:>7.3f}{_fmt(r.get('chroma_p50_ms'), '12.2f')}"
+              f"{_fmt(r.get('chroma_p99_ms'), '8.2f')}{_fmt(r.get('chroma_recall'), '7.3f')}"
+              f"{_fmt(rss, '9.0f')}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000],
+                        help="corpus sizes in paragraphs (e.g. 1000 10000 100000)")
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--skip-chroma", action="store_true")
+    parser.add_argument("--warm-cache", action="store_true", help="keep the on-disk embedding cache")
+    parser.add_argument("--online", action="store_true", help="allow Hugging Face downloads")
+    parser.add_argument("--json", help="also write the raw results here")
+    args = parser.parse_args()
+
+    workdir = Path(tempfile.mkdtemp(prefix="rag_bench_"))
+    if not args.online:
+        os.environ.setdefault("HF_HUB_OFFLINE", "1")
+        os.environ.setdefault("TRANSFORMERS_OFFLINE", "1")
+    if not args.warm_cache:
+        os.environ["EMBEDDING_CACHE_DIR"] = str(workdir / "embedding_cache")
+    # the chatbots build an API client at import time; no request is ever sent here
+    os.environ.setdefault("OPENROUTER_API_KEY", "offline-benchmark")
+
+    chatbot = _load_module(WEEK4_DIR / "chatbot.py", "week4_chatbot", WEEK4_DIR)
+    chroma_bot = None if args.skip_chroma else _load_module(CHROMA_BOT, "chroma_chatbot")
+
+    rows = []
+    for size in args.sizes:
+        print(f"\n── {size} paragraphs ──")
+        rows.append(bench_size(size, args.queries, args.k, chatbot, chroma_bot, workdir))
+
+    print_report(rows, args.k)
+    print(f"\nScratch files: {workdir}")
+    if args.json:
+        Path(args.json).write_text(json.dumps(rows, indent=2), encoding="utf-8")
+
+
+if __name__ == "__main__":
+    main()
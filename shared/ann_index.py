@@ -0,0 +1,148 @@
+"""
+FAISS index backends for the RAG path.
+
+    build_index(embeddings)                       # picks a backend by corpus size
+    build_index(embeddings, backend="hnsw", ef_search=128)
+
+Backends (all L2, so results match the old `IndexFlatL2` ordering):
+
+    flat      exact search – every vector is scanned          (small corpora)
+    hnsw      graph search, no training, high recall          (≤ ~100k)
+    ivf_flat  inverted lists, scans `nprobe` of `nlist` cells (≤ ~1M)
+    ivf_pq    IVF + product quantization, ~16–32× less RAM    (beyond that)
+    sq_fp16   exact scan over float16 codes, 2× less RAM      (opt-in)
+    sq_int8   exact scan over int8 codes, 4× less RAM         (opt-in)
+
+Trained backends (IVF*, sq_int8) are trained on a random sample of the
+corpus, not the whole corpus. Search-time knobs can be changed later with
+`set_search_params(index, nprobe=..., ef_search=...)`.
+
+`rerank=N` wraps any approximate backend in `IndexRefineFlat`: the backend
+proposes N·k candidates and they are re-scored with exact float32 distances.
+That restores recall, but the refine stage keeps a float32 copy of every
+vector, so it buys accuracy back with memory.
+`benchmarks/quantization_bench.py` reports both sides of the trade.
+"""
+
+from __future__ import annotations
+
+import math
+import os
+
+import faiss
+import numpy as np
+
+BACKENDS = ("flat", "hnsw", "ivf_flat", "ivf_pq", "sq_fp16", "sq_int8")
+
+# auto-selection thresholds (number of vectors)
+FLAT_MAX = 5_000
+HNSW_MAX = 100_000
+IVF_FLAT_MAX = 1_000_000
+
+DEFAULT_NPROBE = int(os.getenv("FAISS_NPROBE", "16"))
+DEFAULT_EF_SEARCH = int(os.getenv("FAISS_EF_SEARCH", "64"))
+DEFAULT_RERANK = int(os.getenv("FAISS_RERANK", "0"))     # 0 = no exact re-rank
+HNSW_M = 32
+TRAIN_SAMPLE = 50_000
+
+
+def choose_backend(n_vectors: int) -> str:
+    """Backend `build_index` uses when backend="auto"."""
+    if n_vectors <= FLAT_MAX:
+        return "flat"
+    if n_vectors <= HNSW_MAX:
+        return "hnsw"
+    if n_vectors <= IVF_FLAT_MAX:
+        return "ivf_flat"
+    return "ivf_pq"
+
+
+def _nlist_for(n_vectors: int) -> int:
+    # ~4·√n cells, but keep ≥ 39 training points per centroid (faiss' own minimum)
+    return max(1, min(int(4 * math.sqrt(n_vectors)), n_vectors // 39))
+
+
+def _pq_subquantizers(dim: int) -> int:
+    # largest m ≤ 64 that divides dim (384 → 48), 8 bits per sub-code
+    return next(m for m in range(min(64, dim), 0, -1) if dim % m == 0)
+
+
+def _training_sample(embeddings: np.ndarray, size: int) -> np.ndarray:
+    if len(embeddings) <= size:
+        return embeddings
+    rng = np.random.default_rng(0)
+    return embeddings[rng.choice(len(embeddings), size, replace=False)]
+
+
+def set_search_params(index, nprobe: int | None = None, ef_search: int | None = None) -> None:
+    """Tune search-time recall/latency; silently ignores knobs the index lacks."""
+    params = faiss.ParameterSpace()
+    if nprobe is not None:
+        try:
+            params.set_index_parameter(index, "nprobe", nprobe)
+        except RuntimeError:
+            pass
+    if ef_search is not None:
+        try:
+            params.set_index_parameter(index, "efSearch", ef_search)
+        except RuntimeError:
+            pass
+
+
+def index_nbytes(index) -> int:
+    """Serialized size of *index* – a close proxy for the RAM it occupies."""
+    return int(faiss.serialize_index(index).nbytes)
+
+
+def build_index(
+    embeddings: np.ndarray,
+    backend: str = "auto",
+    nprobe: int = DEFAULT_NPROBE,
+    ef_search: int = DEFAULT_EF_SEARCH,
+    rerank: int = DEFAULT_RERANK,
+):
+    """Build, train (if needed) and fill a FAISS index for *embeddings*."""
+    embeddings = np.ascontiguousarray(embeddings, dtype=np.float32)
+    n, dim = embeddings.shape
+
+    if backend == "auto":
+        backend = choose_backend(n)
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown FAISS backend {backend!r}; expected one of {BACKENDS}")
+
+    if backend == "flat":
+        index = faiss.IndexFlatL2(dim)
+
+    elif backend == "hnsw":
+        index = faiss.IndexHNSWFlat(dim, HNSW_M)
+        index.hnsw.efConstruction = 2 * HNSW_M
+
+    elif backend in ("sq_fp16", "sq_int8"):
+        qtype = faiss.ScalarQuantizer.QT_fp16 if backend == "sq_fp16" else faiss.ScalarQuantizer.QT_8bit
+        index = faiss.IndexScalarQuantizer(dim, qtype, faiss.METRIC_L2)
+        # int8 learns per-dimension ranges; fp16 training is a no-op
+        index.train(_training_sample(embeddings, TRAIN_SAMPLE))
+
+    else:
+        nlist = _nlist_for(n)
+        quantizer = faiss.IndexFlatL2(dim)
+        if backend == "ivf_flat":
+            index = faiss.IndexIVFFlat(quantizer, dim, nlist)
+            sample = _training_sample(embeddings, max(TRAIN_SAMPLE, 39 * nlist))
+        else:
+            if n < 256:
+                raise ValueError("ivf_pq needs at least 256 vectors to train its codebooks")
+            index = faiss.IndexIVFPQ(quantizer, dim, nlist, _pq_subquantizers(dim), 8)
+            # PQ codebooks need ≥ 256 points each on top of the coarse centroids
+            sample = _training_sample(embeddings, max(TRAIN_SAMPLE, 39 * nlist, 256 * 39))
+        index.train(sample)
+
+    if rerank and backend != "flat":
+        index = faiss.IndexRefineFlat(index)
+        index.k_factor = float(rerank)
+        backend += f"+rerank×{rerank}"
+
+    index.add(embeddings)
+    set_search_params(index, nprobe=nprobe, ef_search=ef_search)
+    print(f"FAISS index: {backend} over {n} vectors")
+    return index
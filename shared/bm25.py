@@ -0,0 +1,126 @@
+"""
+Sparse BM25 retrieval over note chunks, plus reciprocal rank fusion.
+
+Dense embeddings are good at paraphrases but weak at exact tokens such as
+course codes ("CS-101") or formula names. `BM25Index` keeps a prebuilt
+inverted index (term → {chunk id: term frequency}), so a query only touches
+the postings of its own terms instead of scanning every chunk.
+
+Chunk ids are whatever the dense index uses (list positions or the
+LiveNotesIndex ids), so both legs can be fused directly:
+
+    fused = reciprocal_rank_fusion([dense_ids, bm25.search_ids(q, 10)])
+"""
+
+from __future__ import annotations
+
+import heapq
+import json
+import math
+import re
+from collections import Counter
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def tokenize(text: str) -> list[str]:
+    return _TOKEN_RE.findall(text.lower())
+
+
+class BM25Index:
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self.postings: dict[str, dict[int, int]] = {}
+        self.doc_len: dict[int, int] = {}
+        self._total_len = 0
+
+    @classmethod
+    def from_chunks(cls, chunks: list[str], **params) -> "BM25Index":
+        index = cls(**params)
+        for doc_id, text in enumerate(chunks):
+            index.add(doc_id, text)
+        return index
+
+    def __len__(self) -> int:
+        return len(self.doc_len)
+
+    #  maintenance
+    def add(self, doc_id: int, text: str) -> None:
+        if doc_id in self.doc_len:
+            self.remove(doc_id)
+        terms = Counter(tokenize(text))
+        for term, tf in terms.items():
+            self.postings.setdefault(term, {})[doc_id] = tf
+        length = sum(terms.values())
+        self.doc_len[doc_id] = length
+        self._total_len += length
+
+    def remove(self, doc_id: int, text: str | None = None) -> None:
+        """Drop a chunk. Passing its *text* avoids scanning the whole vocabulary."""
+        length = self.doc_len.pop(doc_id, None)
+        if length is None:
+            return
+        self._total_len -= length
+        if text is not None:
+            terms = [t for t in set(tokenize(text)) if doc_id in self.postings.get(t, {})]
+        else:
+            terms = [t for t, docs in self.postings.items() if doc_id in docs]
+        for term in terms:
+            del self.postings[term][doc_id]
+            if not self.postings[term]:
+                del self.postings[term]
+
+    #  search
+    def search(self, query: str, k: int = 10) -> list[tuple[int, float]]:
+        """Top-k (chunk id, score) pairs, best first."""
+        n_docs = len(self.doc_len)
+        if not n_docs:
+            return []
+        avg_len = self._total_len / n_docs
+
+        scores: dict[int, float] = {}
+        for term in set(tokenize(query)):
+            docs = self.postings.get(term)
+            if not docs:
+                continue
+            idf = math.log(1 + (n_docs - len(docs) + 0.5) / (len(docs) + 0.5))
+            for doc_id, tf in docs.items():
+                norm = self.k1 * (1 - self.b + self.b * self.doc_len[doc_id] / avg_len)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.k1 + 1) / (tf + norm)
+
+        return heapq.nlargest(k, scores.items(), key=lambda item: item[1])
+
+    def search_ids(self, query: str, k: int = 10) -> list[int]:
+        return [doc_id for doc_id, _ in self.search(query, k)]
+
+    #  persistence
+    def to_bytes(self) -> bytes:
+        return json.dumps({
+            "k1": self.k1,
+            "b": self.b,
+            "postings": self.postings,
+            "doc_len": self.doc_len,
+        }).encode("utf-8")
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "BM25Index":
+        raw = json.loads(data.decode("utf-8"))
+        index = cls(raw["k1"], raw["b"])
+        # JSON turned the int ids into strings
+        index.postings = {
+            term: {int(doc_id): tf for doc_id, tf in docs.items()}
+            for term, docs in raw["postings"].items()
+        }
+        index.doc_len = {int(doc_id): n for doc_id, n in raw["doc_len"].items()}
+        index._total_len = sum(index.doc_len.values())
+        return index
+
+
+def reciprocal_rank_fusion(rankings: list[list[int]], k: int = 60) -> list[int]:
+    """Merge ranked id lists: score(id) = Σ 1 / (k + rank). Best first."""
+    scores: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc_id in enumerate(ranking):
+            scores[doc_id] = scores.get(doc_id, 0.0) + 1.0 / (k + rank + 1)
+    return sorted(scores, key=scores.get, reverse=True)
@@ -0,0 +1,105 @@
+"""
+Multi-process bulk encoding for large ingestion jobs.
+
+One `embedder.encode` call uses a single process. `bulk_encode` sorts the
+chunks by length, cuts them into contiguous slices (so every batch pads to
+similar lengths) and spreads the slices over a pool of worker processes.
+Each worker loads the model once through the registry and gets
+cpu_count // workers intra-op threads, so the workers don't oversubscribe
+the cores:
+
+    vectors = bulk_encode(chunks, "all-MiniLM-L6-v2", workers=8)
+    # Encoded 120000 chunks in 95.3s – 1259 chunks/s on 8 worker(s)
+
+It plugs into the embedding cache as its `encode_fn`, so only new chunks
+are sent to the pool:
+
+    cached_encode(embedder, chunks, model_name,
+                  encode_fn=partial(bulk_encode, model_name=model_name, workers=8))
+"""
+
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+
+from shared.model_registry import DEFAULT_MODEL, EMBED_BACKEND, get_sentence_model
+
+SLICE_SIZE = 512          # chunks per task handed to a worker
+MIN_PARALLEL = 2000       # below this the pool start-up costs more than it saves
+
+last_stats: dict[str, float] = {}   # chunks, seconds, chunks_per_s, workers of the latest call
+
+_worker_model = None
+
+
+def default_workers() -> int:
+    # no env var here: callers pass their own setting (the week4 chatbot: SB_ENCODE_WORKERS)
+    return os.cpu_count() or 1
+
+
+def _init_worker(model_name: str, backend: str | None, threads: int) -> None:
+    global _worker_model
+    # set before torch / onnxruntime are imported by the model load
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    if (backend or EMBED_BACKEND) == "torch":
+        import torch
+
+        torch.set_num_threads(threads)
+    _worker_model = get_sentence_model(model_name, backend, threads=threads)
+
+
+def _encode_slice(texts: list[str], batch_size: int) -> np.ndarray:
+    return _worker_model.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+
+
+def bulk_encode(texts: list[str], model_name: str = DEFAULT_MODEL, backend: str | None = None,
+                workers: int | None = None, batch_size: int = 64) -> np.ndarray:
+    """
+    Encode *texts* with *workers* processes (default: one per core); rows
+    come back in input order.
+    """
+    workers = workers or default_workers()
+    start = time.perf_counter()
+
+    # longest first: slices (and the batches inside them) hold similar lengths
+    order = np.argsort([-len(t) for t in texts], kind="stable")
+    ordered = [str(texts[i]) for i in order]
+    sorted_vecs: np.ndarray | None = None
+
+    if workers <= 1 or len(texts) < MIN_PARALLEL:
+        workers = 1
+        sorted_vecs = get_sentence_model(model_name, backend).encode(
+            ordered, batch_size=batch_size, convert_to_numpy=True)
+    else:
+        threads = max(1, (os.cpu_count() or workers) // workers)
+        # spawn: forking a process that already runs torch threads can deadlock
+        with ProcessPoolExecutor(workers, mp_context=mp.get_context("spawn"),
+                                 initializer=_init_worker,
+                                 initargs=(model_name, backend, threads)) as pool:
+            futures = {
+                pool.submit(_encode_slice, ordered[s:s + SLICE_SIZE], batch_size): s
+                for s in range(0, len(ordered), SLICE_SIZE)
+            }
+            for future in as_completed(futures):
+                vecs = future.result()
+                if sorted_vecs is None:
+                    sorted_vecs = np.empty((len(ordered), vecs.shape[1]), dtype=np.float32)
+                s = futures[future]
+                sorted_vecs[s:s + len(vecs)] = vecs
+
+    if sorted_vecs is None:          # no texts
+        return np.empty((0, 0), dtype=np.float32)
+    vectors = np.empty_like(sorted_vecs, dtype=np.float32)
+    vectors[order] = sorted_vecs
+
+    elapsed = time.perf_counter() - start
+    last_stats.update(chunks=len(texts), seconds=elapsed,
+                      chunks_per_s=len(texts) / elapsed if elapsed else 0.0, workers=workers)
+    print(f"Encoded {len(texts)} chunks in {elapsed:.1f}s – "
+          f"{last_stats['chunks_per_s']:.0f} chunks/s on {workers} worker(s)")
+    return vectors
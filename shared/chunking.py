@@ -0,0 +1,118 @@
+"""
+Token-aware chunking for notes.
+
+Splitting on blank lines gives chunks anywhere from one heading to a whole
+section. `chunk_text` instead packs paragraphs into windows of at most
+`max_tokens` tiktoken tokens, carrying `overlap` tokens from the end of one
+window into the next so an idea that straddles a boundary is still found.
+Paragraphs longer than a window are cut into overlapping token slices.
+
+Each chunk is a `Chunk` – a plain `str` (so FAISS/BM25/Chroma code keeps
+working) that also knows its own token count:
+
+    chunks = chunk_text(notes)
+    chunks[0].tokens          # counted once, here
+    fit_to_budget(retrieved, 800)
+"""
+
+from __future__ import annotations
+
+from functools import lru_cache
+
+import tiktoken
+
+DEFAULT_MAX_TOKENS = 200     # below all-MiniLM-L6-v2's 256 word-piece limit
+DEFAULT_OVERLAP = 40
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+
+class Chunk(str):
+    """A chunk of text that carries its tiktoken token count."""
+
+    tokens: int
+
+    def __new__(cls, text: str, tokens: int):
+        obj = super().__new__(cls, text)
+        obj.tokens = tokens
+        return obj
+
+    def __getnewargs__(self):          # keep the count when pickled (worker pools)
+        return str(self), self.tokens
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str = DEFAULT_MODEL):
+    return tiktoken.encoding_for_model(model)
+
+
+def count_tokens(text: str, model: str = DEFAULT_MODEL) -> int:
+    """Token count of *text*; free for `Chunk`s, which already know it."""
+    if isinstance(text, Chunk):
+        return text.tokens
+    return len(get_encoding(model).encode(text))
+
+
+def chunk_text(
+    text: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    overlap: int = DEFAULT_OVERLAP,
+    model: str = DEFAULT_MODEL,
+) -> list[Chunk]:
+    """Split *text* into paragraph-aligned windows of ≤ *max_tokens* tokens."""
+    if not 0 <= overlap < max_tokens:
+        raise ValueError("overlap must be in [0, max_tokens)")
+    enc = get_encoding(model)
+    stride = max_tokens - overlap
+
+    chunks: list[Chunk] = []
+    window: list[int] = []
+    fresh = False                      # window holds tokens not emitted yet
+
+    def emit() -> None:
+        nonlocal window, fresh
+        if fresh:
+            # count the stripped text: the window's trailing "\n\n" tokens are not in it
+            text = enc.decode(window).strip()
+            chunks.append(Chunk(text, len(enc.encode(text))))
+        window = window[-overlap:] if overlap else []
+        fresh = False
+
+    for para in text.split("\n\n"):
+        para = para.strip()
+        if not para:
+            continue
+        tokens = enc.encode(para + "\n\n")
+
+        if len(tokens) > max_tokens:
+            # oversized paragraph: flush, then slide over it on its own
+            emit()
+            for start in range(0, len(tokens), stride):
+                window = tokens[start:start + max_tokens]
+                fresh = True
+                emit()
+                if start + max_tokens >= len(tokens):
+                    break
+            continue
+
+        if len(window) + len(tokens) > max_tokens:
+            emit()
+            if len(window) + len(tokens) > max_tokens:
+                window = []            # overlap tail would not fit next to it
+        window = window + tokens
+        fresh = True
+
+    emit()
+    return chunks
+
+
+def fit_to_budget(chunks: list[str], max_tokens: int, model: str = DEFAULT_MODEL) -> list[str]:
+    """Keep chunks in order until the next one would exceed *max_tokens*."""
+    kept: list[str] = []
+    total = 0
+    for chunk in chunks:
+        n = count_tokens(chunk, model)
+        if total + n > max_tokens:
+            break
+        kept.append(chunk)
+        total += n
+    return kept
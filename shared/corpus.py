@@ -0,0 +1,217 @@
+"""
+Directory-scale corpus manager: every .md and .pdf under a root folder,
+indexed as one sharded corpus.
+
+    corpus = CorpusManager("studyBuddy", embedder, "all-MiniLM-L6-v2")
+    D, I = corpus.search(query_vecs, k)                        # whole corpus
+    D, I = corpus.search(query_vecs, k, source="week4")        # one shard only
+    corpus.chunks[I[0][0]], corpus.metadata(I[0][0])           # text + {source, page}
+
+Sharding is by directory: all files in one folder (e.g. one course / week)
+form one shard, stored as its own mmap'd bundle (see index_bundle.py) under
+`bundle_root/<shard>`. A shard is rebuilt only when one of its files was
+added, removed or modified, and a source filter picks the shards to search
+up front instead of searching everything and throwing results away.
+
+Global ids are `shard offset + local id`, so the object plugs into the
+chatbot's `retrieve_chunks(question, embedder, index, chunks, k)`.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+from bisect import bisect_right
+from pathlib import Path
+
+import numpy as np
+
+from shared.ann_index import DEFAULT_EF_SEARCH, DEFAULT_NPROBE, build_index, set_search_params
+from shared.chunking import chunk_text
+from shared.embedding_cache import cached_encode
+from shared.index_bundle import bundle_is_fresh, open_bundle, read_extra, save_bundle
+
+SOURCE_SUFFIXES = (".md", ".pdf")
+SOURCES_FILE = "sources.json"     # per-chunk {source, page}, saved in each shard bundle
+
+
+def _read_source(path: Path) -> list[tuple[str, int | None]]:
+    """(text, page) blocks of one file; markdown is a single page-less block."""
+    if path.suffix == ".pdf":
+        import fitz  # PyMuPDF, only needed when the corpus has PDFs
+
+        with fitz.open(path) as doc:
+            return [(doc.load_page(i).get_text(), i + 1) for i in range(len(doc))]
+    return [(path.read_text(encoding="utf-8"), None)]
+
+
+class Shard:
+    def __init__(self, key: str, files: list[Path]):
+        self.key = key              # directory relative to the corpus root ("." for the root)
+        self.files = files
+        self.index = None
+        self.chunks = None
+        self.sources: list[dict] = []
+        self.offset = 0             # first global id of this shard
+
+    def fingerprint(self, root: Path, *settings) -> str:
+        h = hashlib.sha256()
+        for path in self.files:
+            st = path.stat()
+            h.update(f"{path.relative_to(root)}\0{st.st_size}\0{st.st_mtime_ns}\n".encode())
+        for item in settings:
+            h.update(f"\0{item}".encode())
+        return h.hexdigest()
+
+
+class CorpusManager:
+    def __init__(self, root: str, embedder, model_name: str,
+                 bundle_root: str = ".rag_bundle/corpus", backend: str = "auto",
+                 encode_fn=None):
+        self.root = Path(root)
+        self.embedder = embedder
+        self.model_name = model_name
+        self.bundle_root = Path(bundle_root)
+        self.backend = backend
+        self.encode_fn = encode_fn   # e.g. multi-process bulk_encode for big archives
+        self.shards: list[Shard] = []
+        self.chunks = _CorpusChunks(self)
+        self.version = 0        # bumped by every load(), for retrieval caches
+        self.load()
+
+    #  build / load
+    def _discover(self) -> dict[str, list[Path]]:
+        by_dir: dict[str, list[Path]] = {}
+        for path in sorted(self.root.rglob("*")):
+            if path.suffix.lower() in SOURCE_SUFFIXES and path.is_file():
+                key = path.parent.relative_to(self.root).as_posix()
+                by_dir.setdefault(key, []).append(path)
+        return by_dir
+
+    def _bundle_dir(self, shard: Shard) -> Path:
+        slug = "_root" if shard.key == "." else shard.key.replace("/", "__")
+        return self.bundle_root / slug
+
+    def _build_shard(self, shard: Shard, bundle_dir: Path, fingerprint: str) -> None:
+        texts, sources = [], []
+        for path in shard.files:
+            rel = path.relative_to(self.root).as_posix()
+            for block, page in _read_source(path):
+                for chunk in chunk_text(block):
+                    texts.append(chunk)
+                    sources.append({"source": rel, "page": page})
+        if not texts:
+            return
+        embeddings = cached_encode(self.embedder, texts, self.model_name, encode_fn=self.encode_fn)
+        save_bundle(bundle_dir, build_index(embeddings, self.backend), texts, fingerprint,
+                    extra_files={SOURCES_FILE: json.dumps(sources).encode("utf-8")})
+
+    def load(self) -> None:
+        """(Re)open every shard, rebuilding only the shards whose files changed."""
+        self.shards = []
+        offset = 0
+        for key, files in self._discover().items():
+            shard = Shard(key, files)
+            bundle_dir = self._bundle_dir(shard)
+            fingerprint = shard.fingerprint(self.root, self.model_name, self.backend)
+            if not bundle_is_fresh(bundle_dir, fingerprint):
+                print(f"Indexing shard {key!r} ({len(files)} file(s))…")
+                self._build_shard(shard, bundle_dir, fingerprint)
+                if not bundle_is_fresh(bundle_dir, fingerprint):
+                    continue            # no usable text in this folder
+            shard.index, shard.chunks = open_bundle(bundle_dir)
+            # knobs saved in the bundle are build-time values; use the current env ones
+            set_search_params(shard.index, nprobe=DEFAULT_NPROBE, ef_search=DEFAULT_EF_SEARCH)
+            shard.sources = json.loads(read_extra(bundle_dir, SOURCES_FILE) or b"[]")
+            shard.offset = offset
+            offset += len(shard.chunks)
+            self.shards.append(shard)
+        self.version += 1
+        print(f"Corpus: {offset} chunks in {len(self.shards)} shard(s) under {self.root}")
+
+    #  lookup
+    def _locate(self, global_id: int) -> tuple[Shard, int]:
+        pos = bisect_right([s.offset for s in self.shards], global_id) - 1
+        if pos < 0 or global_id >= self.ntotal:
+            raise IndexError(global_id)
+        shard = self.shards[pos]
+        return shard, global_id - shard.offset
+
+    def metadata(self, global_id: int) -> dict:
+        shard, local = self._locate(int(global_id))
+        return shard.sources[local]
+
+    def _shard_filter(self, shard: Shard, source: str) -> str | None:
+        """
+        "all"   – *source* names the shard's folder ("week4", "studyBuddy/week4")
+        "files" – *source* is a file path/prefix inside the shard
+        None    – shard is not searched at all
+        """
+        if shard.key == source or shard.key.endswith("/" + source) or shard.key.startswith(source + "/"):
+            return "all"
+        if any(f.relative_to(self.root).as_posix().startswith(source) for f in shard.files):
+            return "files"
+        return None
+
+    @property
+    def ntotal(self) -> int:
+        return sum(len(s.chunks) for s in self.shards)
+
+    @staticmethod
+    def _search_files(shard: Shard, queries: np.ndarray, k: int, source: str):
+        """
+        Top-k hits inside the shard that come from files under *source*.
+        Hits from sibling files are dropped, so the search is widened
+        (doubling) until every query has k matches or the shard is exhausted.
+        """
+        size = len(shard.chunks)
+        fetch = k
+        while True:
+            d, i = shard.index.search(queries, fetch)
+            keep = np.vectorize(
+                lambda j: j != -1 and shard.sources[j]["source"].startswith(source), otypes=[bool]
+            )(i)
+            if fetch >= size or (keep.sum(axis=1) >= k).all():
+                break
+            fetch = min(fetch * 2, max(size, k))
+        # stable sort moves the kept hits to the front, still nearest first
+        order = np.argsort(~keep, axis=1, kind="stable")[:, :k]
+        d, i, keep = (np.take_along_axis(a, order, 1) for a in (d, i, keep))
+        return d, np.where(keep, i, -1)
+
+    def search(self, queries: np.ndarray, k: int, source: str | None = None):
+        """FAISS-style search over all shards, or only those matching *source*."""
+        queries = np.asarray(queries, dtype=np.float32)
+        source = source.strip("/") if source else None
+
+        all_d, all_i = [], []
+        for shard in self.shards:
+            mode = "all" if source is None else self._shard_filter(shard, source)
+            if mode is None:
+                continue
+            if mode == "files":
+                d, i = self._search_files(shard, queries, k, source)
+            else:
+                d, i = shard.index.search(queries, k)
+            all_d.append(np.where(i == -1, np.inf, d))
+            all_i.append(np.where(i == -1, -1, i + shard.offset))
+
+        if not all_d:
+            return np.full((len(queries), k), np.inf, dtype=np.float32), np.full((len(queries), k), -1)
+        d, i = np.hstack(all_d), np.hstack(all_i)
+        order = np.argsort(d, axis=1, kind="stable")[:, :k]
+        return np.take_along_axis(d, order, 1), np.take_along_axis(i, order, 1)
+
+
+class _CorpusChunks:
+    """Global id → chunk text view over all shards."""
+
+    def __init__(self, corpus: CorpusManager):
+        self._corpus = corpus
+
+    def __len__(self) -> int:
+        return self._corpus.ntotal
+
+    def __getitem__(self, global_id: int) -> str:
+        shard, local = self._corpus._locate(int(global_id))
+        return shard.chunks[local]
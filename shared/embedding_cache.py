@@ -0,0 +1,211 @@
+"""
+Content-addressed, on-disk embedding cache for note chunks.
+
+Every vector is keyed by sha256(model name + chunk text), so a paragraph is
+encoded once per model no matter which notes file or week it came from.
+Restarting a chatbot only encodes chunks that are new or were edited.
+
+Layout (default root: `.embedding_cache`, override with EMBEDDING_CACHE_DIR):
+
+    .embedding_cache/
+        all-MiniLM-L6-v2/
+            <time_ns>-<pid>-<rand>.npz      keys + float32 vectors written by one run
+            ...
+
+A run that finds new chunks writes one new shard. Shard names are unique
+per writer, so two processes never overwrite each other's shard, and a
+shard is written as `<name>.npz.tmp` first, which the loader never picks up.
+Small shards pile up (every notes edit under SB_WATCH_NOTES writes one), so
+once there are more than `MERGE_AT` of them they are merged into a single
+shard (same tmp + os.replace write) and the merged files are deleted. A
+concurrent writer's new shard is never touched: only shards that were read
+into the merged one are removed.
+
+`encode_query` is the in-memory counterpart for query strings: a bounded
+LRU shared by every module that embeds the user's query during a turn.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable
+
+import numpy as np
+
+CACHE_DIR = os.getenv("EMBEDDING_CACHE_DIR", ".embedding_cache")
+_SHARD_RE = re.compile(r"[0-9][\w-]*\.npz")   # finished shards only, never temp files
+MERGE_AT = 16                                  # shard count that triggers a merge
+
+
+def chunk_key(text: str, model_name: str) -> str:
+    """Stable cache key for *text* embedded with *model_name*."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """All cached vectors of one model, loaded into a key → vector dict."""
+
+    def __init__(self, model_name: str, cache_dir: str | os.PathLike = CACHE_DIR):
+        self.model_name = model_name
+        slug = re.sub(r"[^\w.-]", "_", model_name)
+        self.dir = Path(cache_dir) / slug
+        self._vectors: dict[str, np.ndarray] = {}
+        self._load()
+
+    def _shards(self) -> list[Path]:
+        if not self.dir.exists():
+            return []
+        return sorted(p for p in self.dir.glob("[0-9]*.npz") if _SHARD_RE.fullmatch(p.name))
+
+    @staticmethod
+    def _read_shard(shard: Path) -> tuple[np.ndarray, np.ndarray] | None:
+        try:
+            with np.load(shard) as data:
+                return data["keys"], data["vectors"]
+        except FileNotFoundError:
+            return None                 # merged away by another process meanwhile
+        except Exception as exc:  # noqa: BLE001
+            # a half-written shard must not take the chatbot down
+            print(f"Skipping unreadable embedding shard {shard}: {exc}")
+            return None
+
+    def _load(self) -> None:
+        for shard in self._shards():
+            data = self._read_shard(shard)
+            if data is not None:
+                for key, vec in zip(*data):
+                    self._vectors[str(key)] = vec
+
+    def _write_shard(self, keys, vectors: np.ndarray) -> None:
+        self.dir.mkdir(parents=True, exist_ok=True)
+        # unique per writer: no shared counter for concurrent processes to race on
+        name = f"{time.time_ns():020d}-{os.getpid()}-{uuid.uuid4().hex[:8]}.npz"
+        tmp = self.dir / f"{name}.tmp"
+        with open(tmp, "wb") as f:      # a file handle: np.savez adds no extension
+            np.savez(f, keys=np.asarray(keys), vectors=vectors)
+        os.replace(tmp, self.dir / name)  # readers never see a partial shard
+
+    def _merge(self, shards: list[Path]) -> None:
+        """Rewrite *shards* as one shard, then delete them."""
+        merged: dict[str, np.ndarray] = {}
+        read = []
+        for shard in shards:
+            data = self._read_shard(shard)
+            if data is not None:
+                merged.update((str(k), v) for k, v in zip(*data))
+                read.append(shard)
+        if not merged:
+            return
+        self._write_shard(list(merged), np.vstack(list(merged.values())).astype(np.float32, copy=False))
+        for shard in read:
+            shard.unlink(missing_ok=True)
+
+    def __len__(self) -> int:
+        return len(self._vectors)
+
+    def get(self, text: str) -> np.ndarray | None:
+        return self._vectors.get(chunk_key(text, self.model_name))
+
+    def put_many(self, texts: list[str], vectors: np.ndarray) -> None:
+        """Remember *vectors* for *texts* and write them as one new shard (merging if too many)."""
+        if not texts:
+            return
+        keys = [chunk_key(t, self.model_name) for t in texts]
+        vectors = np.asarray(vectors, dtype=np.float32)
+        for key, vec in zip(keys, vectors):
+            self._vectors[key] = vec
+
+        self._write_shard(keys, vectors)
+        shards = self._shards()
+        if len(shards) > MERGE_AT:
+            self._merge(shards)
+
+    def encode(self, embedder, texts: list[str],
+               encode_fn: Callable[[list[str]], np.ndarray] | None = None,
+               **encode_kwargs) -> np.ndarray:
+        """
+        Return one float32 row per text, calling *embedder.encode* (or
+        *encode_fn*, e.g. a multi-process `bulk_encode`) only for texts that
+        are not cached yet.
+        """
+        missing = list(dict.fromkeys(t for t in texts if self.get(t) is None))
+        if missing:
+            print(f"Embedding {len(missing)} new chunk(s), {len(texts) - len(missing)} cached.")
+            if encode_fn is not None:
+                fresh = encode_fn(missing)
+            else:
+                fresh = embedder.encode(missing, convert_to_numpy=True, **encode_kwargs)
+            self.put_many(missing, fresh)
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+        return np.vstack([self.get(t) for t in texts]).astype(np.float32, copy=False)
+
+
+_caches: dict[tuple[str, str], EmbeddingCache] = {}
+
+
+def cached_encode(embedder, texts: list[str], model_name: str,
+                  cache_dir: str | os.PathLike = CACHE_DIR,
+                  encode_fn: Callable[[list[str]], np.ndarray] | None = None) -> np.ndarray:
+    """Drop-in for `embedder.encode(texts, convert_to_numpy=True)` backed by the disk cache."""
+    key = (str(cache_dir), model_name)
+    if key not in _caches:
+        _caches[key] = EmbeddingCache(model_name, cache_dir)
+    return _caches[key].encode(embedder, texts, encode_fn)
+
+
+#  Per-process LRU for query-time embeddings
+#
+# One chat turn embeds the same user query in several places (retrieval,
+# persona domain detection, confidence scoring). All of them go through
+# `encode_query`, so each distinct (model, text) pair hits the model once.
+
+class QueryEmbeddingLRU:
+    def __init__(self, maxsize: int = 1024):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items: OrderedDict[tuple[str, str], np.ndarray] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, embedder, text: str, model_name: str) -> np.ndarray:
+        key = (model_name, text)
+        with self._lock:
+            vec = self._items.get(key)
+            if vec is not None:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return vec
+            self.misses += 1
+
+        vec = np.asarray(embedder.encode([text], convert_to_numpy=True)[0], dtype=np.float32)
+        vec.flags.writeable = False          # shared between callers
+        with self._lock:
+            self._items[key] = vec
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+        return vec
+
+    def stats(self) -> dict[str, int]:
+        return {"hits": self.hits, "misses": self.misses, "size": len(self._items)}
+
+
+_query_lru = QueryEmbeddingLRU(int(os.getenv("QUERY_EMBED_CACHE_SIZE", "1024")))
+
+
+def encode_query(embedder, text: str, model_name: str) -> np.ndarray:
+    """1-D float32 embedding of *text*, memoized across modules."""
+    return _query_lru.encode(embedder, text, model_name)
+
+
+def query_cache_stats() -> dict[str, int]:
+    return _query_lru.stats()
@@ -0,0 +1,122 @@
+"""
+Aho-Corasick matcher for entity mentions.
+
+Checking `ent.lower() in query.lower()` for every stored entity costs
+entities × query length per turn. `EntityMatcher` keeps all entity names in
+one automaton and finds every mentioned entity in a single pass over the
+query, however many entities are stored:
+
+    matcher = EntityMatcher()
+    matcher.add("Isaac Newton"); matcher.add("Paris")
+    matcher.find("what did isaac newton study?")     # ["Isaac Newton"]
+
+Matching is case-insensitive substring matching, same as the old check.
+
+Adding a pattern can change the failure links of nodes anywhere in the
+trie, so new names are not inserted one by one. They wait in a pending list
+that `find` checks with a plain substring test, and every `rebuild_every`
+additions they are inserted together and the links are recomputed (one BFS
+over the trie). The tradeoff: a `find` costs one automaton pass plus at most
+`rebuild_every - 1` substring checks, and a rebuild costs O(trie size) but
+only runs once per batch, instead of after every `add`.
+"""
+
+from __future__ import annotations
+
+from collections import deque
+
+
+REBUILD_EVERY = 32
+
+
+class EntityMatcher:
+    def __init__(self, names=(), rebuild_every: int = REBUILD_EVERY):
+        self._goto: list[dict[str, int]] = [{}]   # trie edges, node 0 = root
+        self._fail: list[int] = [0]
+        self._ends: list[list[int]] = [[]]        # pattern ids ending exactly at a node
+        self._out: list[list[int]] = [[]]         # ... plus those reached via failure links
+        self._patterns: dict[str, int] = {}       # lowercased name → pattern id
+        self._names: list[list[str]] = []         # pattern id → original names, in insertion order
+        self._order: dict[str, int] = {}          # name → insertion index
+        self._pending: list[tuple[str, int]] = [] # (pattern, id) not yet in the trie
+        self.rebuild_every = rebuild_every
+        for name in names:
+            self.add(name)
+        self._flush()
+
+    def __len__(self) -> int:
+        return len(self._order)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._order
+
+    def add(self, name: str) -> None:
+        if not name or name in self._order:
+            return
+        self._order[name] = len(self._order)
+        pattern = name.lower()
+        if pattern in self._patterns:               # "Paris" and "paris" share one pattern
+            self._names[self._patterns[pattern]].append(name)
+            return
+
+        pattern_id = len(self._names)
+        self._patterns[pattern] = pattern_id
+        self._names.append([name])
+        self._pending.append((pattern, pattern_id))
+        if len(self._pending) >= self.rebuild_every:
+            self._flush()
+
+    def _insert(self, pattern: str, pattern_id: int) -> None:
+        node = 0
+        for ch in pattern:
+            nxt = self._goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self._goto)
+                self._goto.append({})
+                self._fail.append(0)
+                self._ends.append([])
+                self._out.append([])
+                self._goto[node][ch] = nxt
+            node = nxt
+        self._ends[node].append(pattern_id)
+
+    def _flush(self) -> None:
+        """Move pending patterns into the trie and rebuild the failure links."""
+        if not self._pending:
+            return
+        for pattern, pattern_id in self._pending:
+            self._insert(pattern, pattern_id)
+        self._pending.clear()
+        self._build()
+
+    def _build(self) -> None:
+        """Recompute failure links and outputs breadth-first."""
+        self._out[0] = list(self._ends[0])
+        queue = deque()
+        for child in self._goto[0].values():
+            self._fail[child] = 0
+            queue.append(child)
+        while queue:
+            node = queue.popleft()
+            self._out[node] = self._ends[node] + self._out[self._fail[node]]
+            for ch, child in self._goto[node].items():
+                f = self._fail[node]
+                while f and ch not in self._goto[f]:
+                    f = self._fail[f]
+                self._fail[child] = self._goto[f].get(ch, 0)
+                queue.append(child)
+
+    def find(self, text: str) -> list[str]:
+        """Stored names occurring in *text* (case-insensitive), in insertion order."""
+        text = text.lower()
+        found: set[int] = set()
+        node = 0
+        for ch in text:
+            while node and ch not in self._goto[node]:
+                node = self._fail[node]
+            node = self._goto[node].get(ch, 0)
+            found.update(self._out[node])
+        # names added since the last rebuild
+        found.update(pattern_id for pattern, pattern_id in self._pending if pattern in text)
+        names = [name for pattern_id in found for name in self._names[pattern_id]]
+        return sorted(names, key=self._order.__getitem__)
@@ -0,0 +1,65 @@
+"""
+Incremental inverted index for keyword-overlap history scoring.
+
+`get_relevant_history` used to re-tokenize every past message on every
+turn. `OverlapIndex` tokenizes each message once, when it is added, and
+keeps a term → message-id postings map, so scoring a query only touches
+the postings of the query's own terms:
+
+    index = OverlapIndex(conversation_history)   # the live list, shared
+    conversation_history.append(msg); index.add(msg)
+    index.search("what is binary search", 3)
+
+Scores and ordering match the old scan exactly: score = number of distinct
+`.lower().split()` words shared with the query, ties broken by message
+order.
+"""
+
+from __future__ import annotations
+
+import heapq
+from collections import Counter
+
+
+def _terms(text: str) -> set[str]:
+    return set(text.lower().split())
+
+
+class OverlapIndex:
+    def __init__(self, messages: list[dict]):
+        self.messages = messages                 # message id = position in this list
+        self.postings: dict[str, list[int]] = {}
+        self._terms: list[set[str]] = []         # per message, so pop() needs no re-tokenizing
+        self.rebuild()
+
+    def rebuild(self) -> None:
+        self.postings.clear()
+        self._terms.clear()
+        for msg in self.messages:
+            self.add(msg)
+
+    def add(self, msg: dict) -> None:
+        """Index *msg*, which must be the newest entry of `messages`."""
+        msg_id = len(self._terms)
+        terms = _terms(msg["content"])
+        self._terms.append(terms)
+        for term in terms:
+            self.postings.setdefault(term, []).append(msg_id)
+
+    def pop(self) -> None:
+        """Forget the newest message (call after popping it from `messages`)."""
+        if not self._terms:
+            return
+        for term in self._terms.pop():
+            ids = self.postings[term]
+            ids.pop()                            # ids are ascending: the newest is last
+            if not ids:
+                del self.postings[term]
+
+    def search(self, query: str, max_messages: int) -> list[dict]:
+        """Up to *max_messages* messages sharing the most words with *query*."""
+        scores: Counter[int] = Counter()
+        for term in _terms(query):
+            scores.update(self.postings.get(term, ()))
+        best = heapq.nsmallest(max_messages, scores.items(), key=lambda item: (-item[1], item[0]))
+        return [self.messages[msg_id] for msg_id, _ in best]
@@ -0,0 +1,186 @@
+"""
+Append-only JSONL journal for chatbot conversation history.
+
+Rewriting the whole history file on every message makes each write
+O(history), i.e. quadratic over a conversation. The journal appends one
+line per event instead:
+
+    {"role": "user", "content": "...", "timestamp": "..."}     a message
+    {"op": "pop"}                                               drop the last message
+    {"op": "checkpoint", "summary": "...", "upto": 42}          rolling-summary checkpoint
+
+    journal = HistoryJournal("SBconversation_history.jsonl",
+                             legacy_json="SBconversation_history.json")
+    history = journal.load()               # streamed line by line
+    journal.append(msg)                    # O(1): one line + flush
+    journal.pop()
+    journal.save_checkpoint({"summary": "...", "upto": 42})   # latest one wins on load
+
+Durability is batched: every line is flushed to the OS at once (a crashed
+process loses nothing), but fsync only runs every `fsync_every` records or
+`fsync_interval` seconds, and on close. Once `compact_every` lines are dead
+(popped messages, their pop markers, superseded checkpoints, torn lines)
+the file is rewritten with just the live records and the latest checkpoint,
+via a temp file + os.replace so a crash never leaves it half-written. The
+journal checks this itself after every append, pop and checkpoint, and on
+load, where a torn line also triggers a rewrite, so no caller has to.
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import time
+from pathlib import Path
+from typing import Iterable, Iterator
+
+POP = {"op": "pop"}
+CHECKPOINT = "checkpoint"
+
+
+class HistoryJournal:
+    def __init__(self, path: str | os.PathLike, legacy_json: str | os.PathLike | None = None,
+                 fsync_every: int = 16, fsync_interval: float = 2.0, compact_every: int = 256):
+        self.path = Path(path)
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+        self.fsync_every = fsync_every
+        self.fsync_interval = fsync_interval
+        self.compact_every = compact_every
+        self.dead_lines = 0            # lines compaction would drop
+        self.torn_lines = 0            # unreadable lines seen by the last load
+        self.checkpoint: dict | None = None
+        self._fh = None
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+        atexit.register(self.close)
+
+    #  reading
+    def _lines(self) -> Iterator[dict]:
+        with open(self.path, "r", encoding="utf-8") as f:
+            for n, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    yield json.loads(line)
+                except json.JSONDecodeError:
+                    # a torn last line after a crash; compaction drops it
+                    print(f"Skipping unreadable history line {n} in {self.path}")
+                    self.dead_lines += 1
+                    self.torn_lines += 1
+
+    def load(self) -> list[dict]:
+        """Live messages in order, built line by line (no whole-file json.load)."""
+        if not self.path.exists():
+            if self.legacy_json and self.legacy_json.exists():
+                self._import_legacy()
+            else:
+                return []
+        records = self._replay()
+        if self.torn_lines or self.needs_compaction:
+            self.compact(records)
+        return records
+
+    def _replay(self) -> list[dict]:
+        """Apply every line in order; also recounts dead lines and finds the checkpoint."""
+        records: list[dict] = []
+        self.dead_lines = self.torn_lines = 0
+        self.checkpoint = None
+        for record in self._lines():
+            op = record.get("op")
+            if op == "pop":
+                self.dead_lines += 1
+                if records:
+                    records.pop()
+                    self.dead_lines += 1
+            elif op == CHECKPOINT:
+                self.dead_lines += self.checkpoint is not None
+                self.checkpoint = {k: v for k, v in record.items() if k != "op"}
+            else:
+                records.append(record)
+        return records
+
+    def load_checkpoint(self) -> dict | None:
+        """Latest checkpoint seen by `load()`."""
+        return self.checkpoint
+
+    def _import_legacy(self) -> None:
+        """One-time migration from the old indent=2 JSON array file."""
+        with open(self.legacy_json, "r", encoding="utf-8") as f:
+            records = json.load(f)
+        self.compact(records)
+        print(f"Migrated {len(records)} message(s) from {self.legacy_json} to {self.path}")
+
+    #  writing
+    def _handle(self):
+        if self._fh is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            torn = False
+            if self.path.exists() and self.path.stat().st_size:
+                with open(self.path, "rb") as f:
+                    f.seek(-1, os.SEEK_END)
+                    torn = f.read(1) != b"\n"
+            self._fh = open(self.path, "a", encoding="utf-8")
+            if torn:                                  # crash mid-line: start a fresh one
+                self._fh.write("\n")
+        return self._fh
+
+    def _write(self, record: dict) -> None:
+        fh = self._handle()
+        fh.write(json.dumps(record, ensure_ascii=False) + "\n")
+        fh.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every or time.monotonic() - self._last_sync >= self.fsync_interval:
+            self.sync()
+
+    def append(self, record: dict) -> None:
+        self._write(record)
+        self._maybe_compact()
+
+    def pop(self) -> None:
+        self._write(POP)
+        self.dead_lines += 2
+        self._maybe_compact()
+
+    def save_checkpoint(self, checkpoint: dict) -> None:
+        self._write({"op": CHECKPOINT, **checkpoint})
+        self.dead_lines += self.checkpoint is not None
+        self.checkpoint = dict(checkpoint)
+        self._maybe_compact()
+
+    def sync(self) -> None:
+        if self._fh is not None and self._unsynced:
+            os.fsync(self._fh.fileno())
+        self._unsynced = 0
+        self._last_sync = time.monotonic()
+
+    @property
+    def needs_compaction(self) -> bool:
+        return self.dead_lines >= self.compact_every
+
+    def _maybe_compact(self) -> None:
+        """Rewrite the file once enough lines are dead (re-reads it for the live records)."""
+        if self.needs_compaction:
+            self.compact(self._replay())
+
+    def compact(self, records: Iterable[dict]) -> None:
+        """Rewrite the journal as exactly *records* (the live history) + the checkpoint."""
+        self.close()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_name(self.path.name + ".tmp")
+        with open(tmp, "w", encoding="utf-8") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+            if self.checkpoint is not None:
+                f.write(json.dumps({"op": CHECKPOINT, **self.checkpoint}, ensure_ascii=False) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)
+        self.dead_lines = self.torn_lines = 0
+
+    def close(self) -> None:
+        if self._fh is not None:
+            self._fh.flush()
+            self.sync()
+            self._fh.close()
+            self._fh = None
@@ -0,0 +1,204 @@
+"""
+Vector memory over past conversation turns.
+
+Every history message is embedded once, when it is appended, into an HNSW
+index (sub-linear top-k search), so a paraphrase of an old question finds
+that turn even when no word overlaps. Files live next to the history file:
+
+    SBconversation_history.vectors.f32    append-only float32 rows (source of truth)
+    SBconversation_history.vectors.json   {"model": ..., "dim": ...}
+    SBconversation_history.faiss          HNSW snapshot, written on exit
+
+Appending a message costs one embed and one row written to the log; the
+snapshot only saves rebuilding the graph at start-up, and rows the
+snapshot is missing (crash, killed process) are re-added from the log.
+
+Each message record stores its vector id as "vid" – its row in the log.
+HNSW cannot delete, so a popped message just drops out of the vid →
+position map and search skips it; once those dead vectors pass
+`REBUILD_FRACTION` of the graph it is rebuilt from the live rows (same
+vids, so no record changes). Dead rows stay in the log file.
+
+Nothing is read or embedded at start-up: `load` only remembers the history
+list, and the first `add` / `search` opens the snapshot and embeds old
+records without a "vid" (then calls *on_backfill* so they get persisted).
+
+    memory = HistoryVectorIndex("SBconversation_history", "all-MiniLM-L6-v2", get_embedder,
+                                on_backfill=save_history)
+    memory.load(history)                 # cheap; the real work happens on first use
+    msg["vid"] = memory.add(msg["content"]); memory.bind(msg["vid"], len(history) - 1)
+    memory.search("how do plants make food?", 3)   # → history positions
+"""
+
+from __future__ import annotations
+
+import atexit
+import json
+import os
+from pathlib import Path
+from typing import Callable
+
+import faiss
+import numpy as np
+
+from shared.ann_index import DEFAULT_EF_SEARCH
+from shared.embedding_cache import cached_encode, encode_query
+
+HNSW_M = 32
+REBUILD_FRACTION = 0.25      # rebuild the graph once this share of its vectors is dead
+
+
+class HistoryVectorIndex:
+    def __init__(self, base_path: str | os.PathLike, model_name: str, get_embedder: Callable[[], object],
+                 on_backfill: Callable[[], None] | None = None):
+        base = str(base_path)
+        self.vec_path = Path(base + ".vectors.f32")
+        self.meta_path = Path(base + ".vectors.json")
+        self.index_path = Path(base + ".faiss")
+        self.model_name = model_name              # cache key; a different model resets the memory
+        self._get_embedder = get_embedder          # lazy: nothing loads until a message is added
+        self._on_backfill = on_backfill
+        self.index: faiss.IndexIDMap2 | None = None   # vid → HNSW vector
+        self.vid_to_pos: dict[int, int] = {}
+        self._rows = 0                             # rows in the log = next vid
+        self._messages: list[dict] | None = None   # history list, until the deferred load runs
+        self._dirty = False
+        atexit.register(self.save)
+
+    #  load / persist
+    @staticmethod
+    def _empty_index(dim: int) -> faiss.IndexIDMap2:
+        hnsw = faiss.IndexHNSWFlat(dim, HNSW_M)
+        hnsw.hnsw.efSearch = DEFAULT_EF_SEARCH
+        return faiss.IndexIDMap2(hnsw)
+
+    def _new_index(self, dim: int) -> None:
+        self.index = self._empty_index(dim)
+        self.meta_path.write_text(json.dumps({"model": self.model_name, "dim": dim}), encoding="utf-8")
+
+    def _load_log(self) -> np.ndarray | None:
+        if not self.meta_path.exists():
+            return None
+        meta = json.loads(self.meta_path.read_text(encoding="utf-8"))
+        if meta["model"] != self.model_name:
+            print(f"History vectors were built with {meta['model']} – re-embedding with {self.model_name}")
+            for path in (self.vec_path, self.meta_path, self.index_path):
+                path.unlink(missing_ok=True)
+            return None
+        dim = meta["dim"]
+        raw = np.fromfile(self.vec_path, dtype=np.float32) if self.vec_path.exists() else np.empty(0, np.float32)
+        rows = len(raw) // dim
+        if len(raw) != rows * dim:                 # torn last row after a crash
+            with open(self.vec_path, "r+b") as f:
+                f.truncate(rows * dim * 4)
+        return raw[:rows * dim].reshape(rows, dim)
+
+    def _read_snapshot(self, dim: int) -> tuple[faiss.IndexIDMap2 | None, int]:
+        """The saved graph and how many log rows it covers, or (None, 0)."""
+        if not self.index_path.exists():
+            return None, 0
+        snapshot = faiss.read_index(str(self.index_path))
+        if not isinstance(snapshot, faiss.IndexIDMap2) or snapshot.d != dim:
+            return None, 0                         # older position-keyed snapshot: rebuild
+        faiss.downcast_index(snapshot.index).hnsw.efSearch = DEFAULT_EF_SEARCH
+        ids = faiss.vector_to_array(snapshot.id_map)
+        return snapshot, int(ids.max()) + 1 if len(ids) else 0
+
+    def load(self, messages: list[dict]) -> None:
+        """Remember *messages*; the index is opened on the first add / search."""
+        self._messages = messages
+
+    def _ensure_loaded(self) -> None:
+        """Open (or rebuild) the index and embed messages without a valid "vid"."""
+        if self._messages is None:
+            return
+        messages, self._messages = self._messages, None
+        vectors = self._load_log()
+        if vectors is not None:
+            self._rows = len(vectors)
+            self.index, covered = self._read_snapshot(vectors.shape[1])
+            if self.index is None or covered > self._rows:
+                self._new_index(vectors.shape[1])
+                covered = 0
+            if covered < self._rows:                # rows the snapshot has not seen
+                self.index.add_with_ids(vectors[covered:], np.arange(covered, self._rows, dtype=np.int64))
+                self._dirty = True
+
+        stale = [m for m in messages if not isinstance(m.get("vid"), int) or m["vid"] >= self._rows]
+        if stale:
+            embedder = self._get_embedder()
+            vids = self._append(cached_encode(embedder, [m["content"] for m in stale], self.model_name))
+            for msg, vid in zip(stale, vids):
+                msg["vid"] = vid
+        self.vid_to_pos = {m["vid"]: pos for pos, m in enumerate(messages)}
+        self._maybe_rebuild()
+        if stale and self._on_backfill:
+            self._on_backfill()                     # persist the new "vid" fields
+
+    def save(self) -> None:
+        """Snapshot the HNSW graph (tmp file + replace) if it changed."""
+        if self.index is None or not self._dirty:
+            return
+        tmp = self.index_path.with_name(self.index_path.name + ".tmp")
+        faiss.write_index(self.index, str(tmp))
+        os.replace(tmp, self.index_path)
+        self._dirty = False
+
+    #  updates
+    def _append(self, vectors: np.ndarray) -> list[int]:
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32).reshape(len(vectors), -1)
+        if self.index is None:
+            self.vec_path.unlink(missing_ok=True)
+            self._new_index(vectors.shape[1])
+            self._rows = 0
+        first = self._rows
+        with open(self.vec_path, "ab") as f:
+            f.write(vectors.tobytes())
+        self._rows += len(vectors)
+        self.index.add_with_ids(vectors, np.arange(first, self._rows, dtype=np.int64))
+        self._dirty = True
+        return list(range(first, self._rows))
+
+    def _maybe_rebuild(self) -> None:
+        """Rebuild the graph from the live rows once too many vectors are dead."""
+        if self.index is None:
+            return
+        dead = self.index.ntotal - len(self.vid_to_pos)
+        if dead <= REBUILD_FRACTION * self.index.ntotal:
+            return
+        live = np.array(sorted(self.vid_to_pos), dtype=np.int64)
+        log = np.memmap(self.vec_path, dtype=np.float32, mode="r").reshape(-1, self.index.d)
+        index = self._empty_index(self.index.d)
+        if len(live):
+            index.add_with_ids(np.ascontiguousarray(log[live]), live)
+        self.index = index
+        self._dirty = True
+
+    def add(self, text: str) -> int:
+        """Embed *text* (memoized with the turn's other query embeddings) and return its vid."""
+        self._ensure_loaded()
+        vec = encode_query(self._get_embedder(), text, self.model_name)
+        return self._append(vec[None, :])[0]
+
+    def bind(self, vid: int, position: int) -> None:
+        self.vid_to_pos[vid] = position
+
+    def unbind(self, vid: int) -> None:
+        if self.vid_to_pos.pop(vid, None) is not None:
+            self._maybe_rebuild()
+
+    #  search
+    def search(self, text: str, k: int) -> list[int]:
+        """History positions of the (up to) *k* messages closest to *text*."""
+        self._ensure_loaded()
+        if self.index is None or self.index.ntotal == 0 or k <= 0:
+            return []
+        vec = encode_query(self._get_embedder(), text, self.model_name)[None, :]
+        # at most REBUILD_FRACTION of the graph is dead, so 2k hits nearly always hold k live ones
+        fetch = min(self.index.ntotal, 2 * k)
+        while True:
+            _, vids = self.index.search(vec, fetch)
+            positions = [self.vid_to_pos[int(v)] for v in vids[0] if int(v) in self.vid_to_pos]
+            if len(positions) >= k or fetch == self.index.ntotal:
+                return positions[:k]
+            fetch = min(self.index.ntotal, fetch * 2)
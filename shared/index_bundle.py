@@ -0,0 +1,144 @@
+"""
+On-disk FAISS index + chunk store, opened with memory mapping.
+
+A bundle is a directory:
+
+    index.faiss    faiss.write_index output
+    chunks.bin     all chunk texts, UTF-8, back to back
+    offsets.npy    int64[n + 1] byte offsets into chunks.bin
+    tokens.npy     int32[n] token count per chunk (only for `Chunk` inputs)
+    meta.json      {"fingerprint": ..., "count": n}   (written last)
+    <extra files>  optional side indexes, e.g. bm25.json
+
+`open_bundle` maps the index with IO_FLAG_MMAP and the text store with
+`mmap`, so several chatbot processes opening the same bundle share one copy
+in the page cache and nothing is re-embedded at startup. `meta.json` is the
+commit marker: a bundle without it (or with a stale fingerprint) is rebuilt.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+
+import faiss
+import numpy as np
+
+from shared.chunking import Chunk
+
+INDEX_FILE = "index.faiss"
+TEXT_FILE = "chunks.bin"
+OFFSETS_FILE = "offsets.npy"
+TOKENS_FILE = "tokens.npy"
+META_FILE = "meta.json"
+
+
+def source_fingerprint(path: str, *extra: str) -> str:
+    """Hash of a source file's bytes plus build settings (model, backend…)."""
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    for item in extra:
+        h.update(b"\0" + str(item).encode("utf-8"))
+    return h.hexdigest()
+
+
+class MmapChunkStore:
+    """Read-only, list-like view of the chunk texts in a bundle."""
+
+    def __init__(self, bundle_dir: str | os.PathLike):
+        bundle_dir = Path(bundle_dir)
+        self._offsets = np.load(bundle_dir / OFFSETS_FILE, mmap_mode="r")
+        tokens_path = bundle_dir / TOKENS_FILE
+        self._tokens = np.load(tokens_path, mmap_mode="r") if tokens_path.exists() else None
+        self._file = open(bundle_dir / TEXT_FILE, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        # mmap cannot map an empty file
+        self._buf = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __getitem__(self, i: int) -> str:
+        i = int(i)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        start, end = int(self._offsets[i]), int(self._offsets[i + 1])
+        text = self._buf[start:end].decode("utf-8")
+        if self._tokens is not None:
+            return Chunk(text, int(self._tokens[i]))
+        return text
+
+    def __iter__(self):
+        return (self[i] for i in range(len(self)))
+
+
+def save_bundle(bundle_dir: str | os.PathLike, index, chunks: list[str], fingerprint: str,
+                extra_files: dict[str, bytes] | None = None) -> None:
+    """
+    Write *index* and *chunks* (plus any *extra_files*, name → bytes) to
+    *bundle_dir*, each file replaced atomically.
+    """
+    bundle_dir = Path(bundle_dir)
+    bundle_dir.mkdir(parents=True, exist_ok=True)
+    (bundle_dir / META_FILE).unlink(missing_ok=True)   # invalid until fully written
+
+    encoded = [c.encode("utf-8") for c in chunks]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+    def _replace(name: str, write) -> None:
+        tmp = bundle_dir / (name + ".tmp")
+        write(tmp)
+        os.replace(tmp, bundle_dir / name)
+
+    def _save_array(array: np.ndarray):
+        def write(path: Path) -> None:
+            with open(path, "wb") as f:  # np.save(path) would append ".npy"
+                np.save(f, array)
+        return write
+
+    _replace(INDEX_FILE, lambda p: faiss.write_index(index, str(p)))
+    _replace(TEXT_FILE, lambda p: p.write_bytes(b"".join(encoded)))
+    _replace(OFFSETS_FILE, _save_array(offsets))
+    if chunks and all(isinstance(c, Chunk) for c in chunks):
+        _replace(TOKENS_FILE, _save_array(np.array([c.tokens for c in chunks], dtype=np.int32)))
+    else:
+        (bundle_dir / TOKENS_FILE).unlink(missing_ok=True)
+    for name, data in (extra_files or {}).items():
+        _replace(name, lambda p, data=data: p.write_bytes(data))
+    _replace(META_FILE, lambda p: p.write_text(
+        json.dumps({"fingerprint": fingerprint, "count": len(chunks)}), encoding="utf-8"
+    ))
+
+
+def bundle_is_fresh(bundle_dir: str | os.PathLike, fingerprint: str) -> bool:
+    meta = Path(bundle_dir) / META_FILE
+    if not meta.exists():
+        return False
+    try:
+        return json.loads(meta.read_text(encoding="utf-8")).get("fingerprint") == fingerprint
+    except ValueError:
+        return False
+
+
+def read_extra(bundle_dir: str | os.PathLike, name: str) -> bytes | None:
+    """Bytes of an extra file saved with the bundle, or None if absent."""
+    path = Path(bundle_dir) / name
+    return path.read_bytes() if path.exists() else None
+
+
+def open_bundle(bundle_dir: str | os.PathLike):
+    """Return (index, chunks) with both backed by memory-mapped files."""
+    path = str(Path(bundle_dir) / INDEX_FILE)
+    flags = faiss.IO_FLAG_MMAP | getattr(faiss, "IO_FLAG_MMAP_IFC", 0)
+    try:
+        index = faiss.read_index(path, flags)
+    except RuntimeError:
+        # index type without mmap support in this faiss build – load normally
+        index = faiss.read_index(path)
+    return index, MmapChunkStore(bundle_dir)
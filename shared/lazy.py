@@ -0,0 +1,89 @@
+"""
+Lazy handles for heavy models (spaCy, tiktoken, sentence embedders,
+Detoxify) plus a background warm-up.
+
+Modules declare a handle at import time instead of loading the model:
+
+    nlp = LazyResource("spaCy en_core_web_sm", lambda: spacy.load("en_core_web_sm"))
+    doc = nlp.get()(text)          # loads on first use, then returns the same object
+
+The REPL calls `warm_up()` as soon as it starts; one daemon thread then
+loads the handles passed to it first and every other registered handle
+after them, in declaration order. Each handle has its own lock, so a query
+that needs a model the thread has not reached yet loads just that model
+itself, and one that needs a model mid-load waits for that load only.
+
+`optional=True` handles turn a failed load into `None` (for "use it if it
+is installed" models like Detoxify) instead of raising on every `get()`.
+"""
+
+from __future__ import annotations
+
+import threading
+import time
+from typing import Callable, Generic, TypeVar
+
+T = TypeVar("T")
+
+_registry: list["LazyResource"] = []
+_warm_thread: threading.Thread | None = None
+
+
+class LazyResource(Generic[T]):
+    def __init__(self, name: str, loader: Callable[[], T], optional: bool = False):
+        self.name = name
+        self.optional = optional
+        self.load_seconds: float | None = None
+        self._loader = loader
+        self._value: T | None = None
+        self._error: BaseException | None = None
+        self._done = False
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    @property
+    def ready(self) -> bool:
+        return self._done
+
+    def get(self) -> T | None:
+        """The loaded object, loading it now if nobody has yet."""
+        if not self._done:
+            with self._lock:
+                if not self._done:          # the warm-up thread may have finished meanwhile
+                    start = time.perf_counter()
+                    try:
+                        self._value = self._loader()
+                    except Exception as exc:  # noqa: BLE001
+                        self._error = exc
+                        if self.optional:
+                            print(f"{self.name} unavailable: {exc}")
+                    self.load_seconds = time.perf_counter() - start
+                    self._done = True
+        if self._error is not None and not self.optional:
+            raise self._error
+        return self._value
+
+
+def _warm_all(first: tuple[LazyResource, ...]) -> None:
+    for resource in list(first) + [r for r in _registry if r not in first]:
+        try:
+            resource.get()
+        except Exception:  # noqa: BLE001
+            pass    # re-raised to whichever caller actually needs it
+
+
+def warm_up(*first: LazyResource) -> threading.Thread:
+    """Start loading *first*, then every other registered handle, in the background (once)."""
+    global _warm_thread
+    if _warm_thread is None:
+        _warm_thread = threading.Thread(target=_warm_all, args=(first,), name="model-warmup",
+                                        daemon=True)
+        _warm_thread.start()
+    return _warm_thread
+
+
+def warmup_report() -> str:
+    return "\n".join(
+        f"{r.name}: " + (f"{r.load_seconds:.2f}s" if r.ready else "not loaded yet")
+        for r in _registry
+    )
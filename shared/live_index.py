@@ -0,0 +1,138 @@
+"""
+Incrementally maintained FAISS index over a notes file.
+
+`LiveNotesIndex` wraps an `IndexIDMap2(IndexFlatL2)` and gives every paragraph
+a stable int64 id. Before each search it stats the notes file; if the file
+changed it re-chunks it, diffs the paragraphs against what is indexed and
+
+    • removes vectors of paragraphs that disappeared,
+    • encodes + adds only paragraphs that are new (an edit = remove + add).
+
+So editing one paragraph of `my_note.md` costs one embedding, not a full
+rebuild, and the next query already sees the change.
+
+It quacks like a FAISS index (`search`, `ntotal`) and `.chunks` is an
+id → text dict, so the existing
+
+    retrieve_chunks(question, embedder, index, chunks, k)
+
+helpers work unchanged. `.bm25` is a sparse index over the same ids, kept
+in step with every edit for hybrid retrieval.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable
+
+import faiss
+import numpy as np
+
+from shared.bm25 import BM25Index
+from shared.embedding_cache import cached_encode
+
+
+class LiveNotesIndex:
+    def __init__(
+        self,
+        file_path: str,
+        embedder,
+        model_name: str,
+        chunk_fn: Callable[[str], list[str]],
+        chunks: list[str] | None = None,
+        embeddings: np.ndarray | None = None,
+    ):
+        """
+        *chunk_fn(file_path)* must return the paragraph list (e.g. the
+        chatbot's `load_and_chunk_document`). Pass already computed
+        *chunks*/*embeddings* to skip the initial encode.
+        """
+        self.file_path = file_path
+        self.embedder = embedder
+        self.model_name = model_name
+        self.chunk_fn = chunk_fn
+
+        self.chunks: dict[int, str] = {}     # id → paragraph text
+        self._ids_by_text: dict[str, int] = {}
+        self._next_id = 0
+        self.version = 0        # bumped on every mutation (retrieval caches key on it)
+
+        dim = embedder.get_sentence_embedding_dimension()
+        self.index = faiss.IndexIDMap2(faiss.IndexFlatL2(dim))
+        self.bm25 = BM25Index()
+
+        self._stamp = self._file_stamp()
+        if chunks is None:
+            chunks = chunk_fn(file_path)
+            embeddings = None
+        if embeddings is None:
+            embeddings = self._encode(chunks)
+        self._add(chunks, embeddings)
+
+    #  file change detection
+    def _file_stamp(self) -> tuple[int, int] | None:
+        try:
+            st = os.stat(self.file_path)
+        except OSError:
+            return None
+        return st.st_mtime_ns, st.st_size
+
+    def refresh(self) -> bool:
+        """Apply any edits made to the notes file. Returns True if the index changed."""
+        stamp = self._file_stamp()
+        if stamp is None or stamp == self._stamp:
+            return False
+        try:
+            paragraphs = self.chunk_fn(self.file_path)
+        except Exception as exc:  # noqa: BLE001
+            # file is mid-save or emptied – keep serving the old index
+            print(f"Notes reload skipped: {exc}")
+            return False
+        self._stamp = stamp
+
+        new_texts = list(dict.fromkeys(paragraphs))
+        wanted = set(new_texts)
+        removed = [t for t in self._ids_by_text if t not in wanted]
+        added = [t for t in new_texts if t not in self._ids_by_text]
+
+        if removed:
+            ids = np.array([self._ids_by_text.pop(t) for t in removed], dtype=np.int64)
+            self.index.remove_ids(ids)
+            for i in ids:
+                self.bm25.remove(int(i), self.chunks.pop(int(i)))
+        if added:
+            self._add(added, self._encode(added))
+
+        if removed or added:
+            self.version += 1
+            print(f"Notes changed: +{len(added)} / -{len(removed)} paragraph(s) re-indexed.")
+        return bool(removed or added)
+
+    #  index maintenance
+    def _encode(self, texts: list[str]) -> np.ndarray:
+        return cached_encode(self.embedder, texts, self.model_name)
+
+    def _add(self, texts: list[str], embeddings: np.ndarray) -> None:
+        rows, ids = [], []
+        for text, vec in zip(texts, embeddings):
+            if text in self._ids_by_text:        # duplicate paragraph
+                continue
+            self._ids_by_text[text] = self._next_id
+            self.chunks[self._next_id] = text
+            self.bm25.add(self._next_id, text)
+            ids.append(self._next_id)
+            rows.append(vec)
+            self._next_id += 1
+        if ids:
+            self.index.add_with_ids(
+                np.asarray(rows, dtype=np.float32), np.asarray(ids, dtype=np.int64)
+            )
+
+    #  FAISS-compatible surface
+    @property
+    def ntotal(self) -> int:
+        return self.index.ntotal
+
+    def search(self, queries: np.ndarray, k: int):
+        self.refresh()
+        return self.index.search(np.asarray(queries, dtype=np.float32), k)
@@ -0,0 +1,117 @@
+"""
+Process-wide registry of embedding models.
+
+Every module asks the registry for its encoder instead of constructing its
+own `SentenceTransformer`, so one set of weights is loaded once and shared:
+
+    from shared.model_registry import get_sentence_model
+    embedder = get_sentence_model("all-MiniLM-L6-v2")
+
+Models load lazily on first request (thread-safe) and the registry records
+how long each load took and how much memory the weights occupy:
+
+    print(model_report())
+
+The backend is chosen per process with EMBED_BACKEND:
+
+    torch       SentenceTransformer on PyTorch (default)
+    onnx        ONNX Runtime export of the same weights (see onnx_encoder.py)
+    onnx-int8   the ONNX export with dynamic int8 quantization
+
+All three expose `encode(list[str]) -> ndarray`.
+"""
+
+from __future__ import annotations
+
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+DEFAULT_MODEL = "all-MiniLM-L6-v2"
+BACKENDS = ("torch", "onnx", "onnx-int8")
+EMBED_BACKEND = os.getenv("EMBED_BACKEND", "torch")
+
+
+@dataclass
+class ModelStats:
+    name: str
+    load_seconds: float
+    param_bytes: int      # weights + buffers held by the model
+
+    @property
+    def param_mb(self) -> float:
+        return self.param_bytes / (1024 * 1024)
+
+
+_models: dict[tuple[str, str], object] = {}
+_stats: dict[tuple[str, str], ModelStats] = {}
+_lock = threading.Lock()
+
+
+def _model_bytes(model) -> int:
+    """Bytes taken by a torch module's parameters and buffers (0 if unknown)."""
+    if hasattr(model, "nbytes"):          # ONNX encoder: size of the model file
+        return model.nbytes
+    try:
+        tensors = list(model.parameters()) + list(model.buffers())
+        return sum(t.numel() * t.element_size() for t in tensors)
+    except Exception:  # noqa: BLE001
+        return 0
+
+
+def _load(name: str, backend: str, threads: int | None = None):
+    if backend == "torch":
+        from sentence_transformers import SentenceTransformer
+
+        return SentenceTransformer(name)
+    if backend in ("onnx", "onnx-int8"):
+        from shared.onnx_encoder import load_onnx_encoder
+
+        return load_onnx_encoder(name, quantized=backend == "onnx-int8", threads=threads)
+    raise ValueError(f"unknown EMBED_BACKEND {backend!r}; choose from {BACKENDS}")
+
+
+def get_sentence_model(name: str = DEFAULT_MODEL, backend: str | None = None, threads: int | None = None):
+    """
+    Return the shared encoder *name* on *backend*, loading it on first use.
+    *threads* caps an ONNX session's thread pool; it only applies to that
+    first load (torch threads are set process-wide with torch.set_num_threads).
+    """
+    key = (name, backend or EMBED_BACKEND)
+    model = _models.get(key)
+    if model is not None:
+        return model
+
+    with _lock:
+        if key not in _models:          # another thread may have won the race
+            start = time.perf_counter()
+            model = _load(*key, threads)
+            label = name if key[1] == "torch" else f"{name} [{key[1]}]"
+            _stats[key] = ModelStats(label, time.perf_counter() - start, _model_bytes(model))
+            _models[key] = model
+        return _models[key]
+
+
+def model_key(name: str = DEFAULT_MODEL, backend: str | None = None) -> str:
+    """
+    Name to key cached vectors by. fp32 ONNX matches torch to ~1e-6, so they
+    share cache entries; int8 vectors differ and get their own.
+    """
+    backend = backend or EMBED_BACKEND
+    return f"{name}@{backend}" if backend == "onnx-int8" else name
+
+
+def model_stats() -> dict[str, ModelStats]:
+    """Load time and memory of every model loaded so far."""
+    return {s.name: s for s in _stats.values()}
+
+
+def model_report() -> str:
+    """One line per loaded model, e.g. for a startup log."""
+    if not _stats:
+        return "No embedding models loaded."
+    return "\n".join(
+        f"{s.name}: loaded in {s.load_seconds:.2f}s, {s.param_mb:.1f} MB"
+        for s in _stats.values()
+    )
@@ -0,0 +1,218 @@
+"""
+ONNX Runtime backend for sentence embedders.
+
+PyTorch `SentenceTransformer.encode` dominates query latency and ingestion
+time on CPU-only hosts. This module exports the transformer once to ONNX
+(optionally quantized to int8 with dynamic quantization) and serves the
+same interface:
+
+    encoder = load_onnx_encoder("all-MiniLM-L6-v2", quantized=True)
+    vectors = encoder.encode(["first chunk", "second chunk"])   # (2, 384) float32
+
+Pooling and normalization are replayed in numpy from the source model's
+sentence-transformers pipeline, so fp32 vectors match torch to ~1e-6.
+Use it through the registry (EMBED_BACKEND=onnx / onnx-int8, see
+model_registry.py) or check parity from the command line:
+
+    python -m shared.onnx_encoder --int8 --check
+
+Layout (root: `.onnx_models`, override with ONNX_MODEL_DIR):
+
+    .onnx_models/all-MiniLM-L6-v2/
+        model.onnx          fp32 export
+        model.int8.onnx     dynamic int8 quantization (on demand)
+        encoder.json        dim, max_seq_length, input names, normalize flag
+        tokenizer files
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+from pathlib import Path
+
+import numpy as np
+
+ONNX_DIR = os.getenv("ONNX_MODEL_DIR", ".onnx_models")
+CONFIG_FILE = "encoder.json"
+FP32_FILE = "model.onnx"
+INT8_FILE = "model.int8.onnx"
+OPSET = 14
+
+PARITY_TEXTS = [
+    "What is the time complexity of binary search?",
+    "Photosynthesis converts light energy into chemical energy.",
+    "Newton's second law: force equals mass times acceleration.",
+    "def fib(n): return n if n < 2 else fib(n - 1) + fib(n - 2)",
+    "The French Revolution began in 1789.",
+    "",
+]
+
+
+def model_dir(model_name: str, root: str | os.PathLike = ONNX_DIR) -> Path:
+    return Path(root) / re.sub(r"[^\w.-]", "_", model_name)
+
+
+def export_onnx(model_name: str, root: str | os.PathLike = ONNX_DIR, quantize: bool = False) -> Path:
+    """Export *model_name* to ONNX (and int8 if *quantize*); returns its folder."""
+    out = model_dir(model_name, root)
+    fp32, int8 = out / FP32_FILE, out / INT8_FILE
+
+    if not (out / CONFIG_FILE).exists() or not fp32.exists():
+        import torch
+        from sentence_transformers import SentenceTransformer
+        from sentence_transformers.models import Normalize, Pooling
+
+        st = SentenceTransformer(model_name, device="cpu")
+        transformer = st[0]
+        pooling = next((m for m in st if isinstance(m, Pooling)), None)
+        if pooling is None or not pooling.pooling_mode_mean_tokens:
+            raise ValueError(f"{model_name}: only mean-pooled models can be exported")
+
+        tokenizer = transformer.tokenizer
+        input_names = [n for n in ("input_ids", "attention_mask", "token_type_ids")
+                       if n in tokenizer.model_input_names]
+
+        class _TokenEmbeddings(torch.nn.Module):
+            def __init__(self, model):
+                super().__init__()
+                self.model = model
+
+            def forward(self, *inputs):
+                return self.model(**dict(zip(input_names, inputs)))[0]
+
+        out.mkdir(parents=True, exist_ok=True)
+        dummy = tokenizer(["export sample"], return_tensors="pt")
+        with torch.no_grad():
+            torch.onnx.export(
+                _TokenEmbeddings(transformer.auto_model.eval()),
+                tuple(dummy[n] for n in input_names),
+                str(fp32),
+                input_names=input_names,
+                output_names=["token_embeddings"],
+                dynamic_axes={n: {0: "batch", 1: "sequence"} for n in input_names + ["token_embeddings"]},
+                opset_version=OPSET,
+            )
+        tokenizer.save_pretrained(out)
+        config = {
+            "model_name": model_name,
+            "dim": st.get_sentence_embedding_dimension(),
+            "max_seq_length": st.max_seq_length,
+            "input_names": input_names,
+            "normalize": any(isinstance(m, Normalize) for m in st),
+        }
+        (out / CONFIG_FILE).write_text(json.dumps(config, indent=2), encoding="utf-8")
+        print(f"Exported {model_name} to {fp32}")
+
+    if quantize and not int8.exists():
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        quantize_dynamic(str(fp32), str(int8), weight_type=QuantType.QInt8)
+        print(f"Quantized {model_name} to {int8}")
+    return out
+
+
+class OnnxSentenceEncoder:
+    """`SentenceTransformer.encode`-compatible encoder running on ONNX Runtime."""
+
+    def __init__(self, folder: str | os.PathLike, quantized: bool = False, threads: int | None = None):
+        import onnxruntime as ort
+        from transformers import AutoTokenizer
+
+        folder = Path(folder)
+        config = json.loads((folder / CONFIG_FILE).read_text(encoding="utf-8"))
+        self.model_name = config["model_name"]
+        self.dim = config["dim"]
+        self.max_seq_length = config["max_seq_length"]
+        self.input_names = config["input_names"]
+        self.normalize = config["normalize"]
+        self.path = folder / (INT8_FILE if quantized else FP32_FILE)
+
+        options = ort.SessionOptions()
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        if threads:
+            # ORT sizes its own pools (it ignores OMP_NUM_THREADS); cap them so
+            # several worker processes don't each spin up one thread per core
+            options.intra_op_num_threads = threads
+            options.inter_op_num_threads = 1
+        self.session = ort.InferenceSession(str(self.path), options, providers=["CPUExecutionProvider"])
+        self.tokenizer = AutoTokenizer.from_pretrained(folder)
+
+    @property
+    def nbytes(self) -> int:
+        return self.path.stat().st_size
+
+    def get_sentence_embedding_dimension(self) -> int:
+        return self.dim
+
+    def encode(self, sentences, batch_size: int = 32, convert_to_numpy: bool = True,
+               normalize_embeddings: bool = False, **_ignored) -> np.ndarray:
+        """Embed a string (→ 1-D) or list of strings (→ 2-D float32 array)."""
+        single = isinstance(sentences, str)
+        if single:
+            sentences = [sentences]
+        out = np.zeros((len(sentences), self.dim), dtype=np.float32)
+
+        # longest first, so each batch pads to similar lengths
+        order = np.argsort([-len(s) for s in sentences], kind="stable")
+        for start in range(0, len(order), batch_size):
+            idx = order[start:start + batch_size]
+            batch = self.tokenizer([sentences[i] for i in idx], padding=True, truncation=True,
+                                   max_length=self.max_seq_length, return_tensors="np")
+            feeds = {n: batch[n].astype(np.int64) for n in self.input_names}
+            tokens = self.session.run(None, feeds)[0]
+            mask = batch["attention_mask"][..., None].astype(np.float32)
+            out[idx] = (tokens * mask).sum(axis=1) / np.clip(mask.sum(axis=1), 1e-9, None)
+
+        if self.normalize or normalize_embeddings:
+            out /= np.clip(np.linalg.norm(out, axis=1, keepdims=True), 1e-12, None)
+        return out[0] if single else out
+
+
+def load_onnx_encoder(model_name: str, quantized: bool = False,
+                      root: str | os.PathLike = ONNX_DIR, threads: int | None = None) -> OnnxSentenceEncoder:
+    """Export on first use, then open the (fp32 or int8) ONNX encoder."""
+    return OnnxSentenceEncoder(export_onnx(model_name, root, quantize=quantized), quantized, threads)
+
+
+def parity_check(model_name: str, quantized: bool = False, texts: list[str] | None = None) -> dict[str, float]:
+    """Compare ONNX vectors with the torch backend on *texts*."""
+    from shared.model_registry import get_sentence_model
+
+    texts = texts or PARITY_TEXTS
+    reference = get_sentence_model(model_name, backend="torch").encode(texts, convert_to_numpy=True)
+    candidate = load_onnx_encoder(model_name, quantized).encode(texts)
+
+    cosine = (reference * candidate).sum(axis=1) / (
+        np.linalg.norm(reference, axis=1) * np.linalg.norm(candidate, axis=1)
+    )
+    return {
+        "max_abs_diff": float(np.abs(reference - candidate).max()),
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+    }
+
+
+def main() -> None:
+    import argparse
+
+    from shared.model_registry import DEFAULT_MODEL
+
+    parser = argparse.ArgumentParser(description="Export a sentence embedder to ONNX.")
+    parser.add_argument("--model", default=DEFAULT_MODEL)
+    parser.add_argument("--int8", action="store_true", help="also write a dynamic int8 model")
+    parser.add_argument("--check", action="store_true", help="compare against the torch backend")
+    args = parser.parse_args()
+
+    export_onnx(args.model, quantize=args.int8)
+    if args.check:
+        for quantized in ([False, True] if args.int8 else [False]):
+            result = parity_check(args.model, quantized)
+            label = "int8" if quantized else "fp32"
+            print(f"{label}: max |Δ| {result['max_abs_diff']:.2e}, "
+                  f"cosine min {result['min_cosine']:.5f} / mean {result['mean_cosine']:.5f}")
+
+
+if __name__ == "__main__":
+    main()
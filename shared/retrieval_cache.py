@@ -0,0 +1,90 @@
+"""
+Bounded cache of retrieval results.
+
+Students repeat questions; a repeat should not pay for a query encode plus a
+FAISS/Chroma search. Entries are keyed on
+
+    (normalized query, k, source filter, retrieval mode)
+
+and stamped with the index *version*. Any index mutation changes the
+version (see `index_version`), and the first lookup that sees a new version
+drops every cached result, so stale chunks are never served.
+
+    cache = RetrievalCache(maxsize=256)
+    hit = cache.get(key, version)
+    ...
+    cache.put(key, version, results)
+    cache.stats()   # {"hits": .., "misses": .., "hit_rate": .., "size": ..}
+"""
+
+from __future__ import annotations
+
+import re
+import threading
+from collections import OrderedDict
+from typing import Any, Hashable
+
+_SPACE_RE = re.compile(r"\s+")
+
+
+def normalize_query(query: str) -> str:
+    """Case/whitespace/trailing-punctuation insensitive form of a question."""
+    return _SPACE_RE.sub(" ", query.lower()).strip().rstrip("?!. ")
+
+
+def index_version(index) -> Hashable:
+    """
+    Version stamp of an index. Mutable indexes (LiveNotesIndex,
+    CorpusManager) expose a `version` counter; a plain FAISS index is only
+    ever appended to here, so its identity + size is enough.
+    """
+    version = getattr(index, "version", None)
+    if version is not None:
+        return version
+    return id(index), getattr(index, "ntotal", None)
+
+
+class RetrievalCache:
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._version: Hashable = None
+        self._items: OrderedDict[Hashable, Any] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def _check_version(self, version: Hashable) -> None:
+        if version != self._version:
+            self._items.clear()
+            self._version = version
+
+    def get(self, key: Hashable, version: Hashable) -> Any | None:
+        with self._lock:
+            self._check_version(version)
+            if key in self._items:
+                self._items.move_to_end(key)
+                self.hits += 1
+                return self._items[key]
+            self.misses += 1
+            return None
+
+    def put(self, key: Hashable, version: Hashable, value: Any) -> None:
+        with self._lock:
+            self._check_version(version)
+            self._items[key] = value
+            self._items.move_to_end(key)
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def invalidate(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def stats(self) -> dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else 0.0,
+            "size": len(self._items),
+        }
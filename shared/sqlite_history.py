@@ -0,0 +1,144 @@
+"""
+SQLite history store with an FTS5 full-text index.
+
+Drop-in alternative to `HistoryJournal` (same load / append / pop /
+compact / close calls) that also answers "which past messages are relevant
+to this query" with an indexed, BM25-ranked FTS5 query instead of a scan
+over every message:
+
+    store = SQLiteHistory("SBconversation_history.db",
+                          legacy_journal="SBconversation_history.jsonl",
+                          legacy_json="SBconversation_history.json")
+    history = store.load()
+    store.append({"role": "user", "content": "...", "timestamp": "..."})
+    store.search("binary search complexity", limit=3)   # best matches first
+    store.save_checkpoint({"summary": "...", "upto": 42})  # rolling-summary checkpoint
+
+Each row keeps the full message as JSON (so extra per-message fields
+survive a round trip) plus its content, which triggers mirror into the FTS5
+table. WAL mode with synchronous=NORMAL keeps one commit per message cheap.
+
+A new database imports the JSONL journal, or, if there is none yet, the old
+indent=2 JSON file (migrated through the journal, as that backend would).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import re
+import sqlite3
+from pathlib import Path
+from typing import Iterable
+
+_WORD_RE = re.compile(r"\w+")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS messages (
+    id      INTEGER PRIMARY KEY,
+    content TEXT NOT NULL,
+    record  TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS messages_fts USING fts5(
+    content, content='messages', content_rowid='id', tokenize='unicode61'
+);
+CREATE TABLE IF NOT EXISTS checkpoint (
+    id     INTEGER PRIMARY KEY CHECK (id = 1),
+    record TEXT NOT NULL
+);
+CREATE TRIGGER IF NOT EXISTS messages_ai AFTER INSERT ON messages BEGIN
+    INSERT INTO messages_fts(rowid, content) VALUES (new.id, new.content);
+END;
+CREATE TRIGGER IF NOT EXISTS messages_ad AFTER DELETE ON messages BEGIN
+    INSERT INTO messages_fts(messages_fts, rowid, content) VALUES ('delete', old.id, old.content);
+END;
+"""
+
+
+def fts5_available() -> bool:
+    try:
+        sqlite3.connect(":memory:").execute("CREATE VIRTUAL TABLE t USING fts5(x)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def _match_expression(query: str) -> str | None:
+    """Any-term FTS5 query for *query*'s words, each quoted so no word is read as syntax."""
+    words = dict.fromkeys(_WORD_RE.findall(query.lower()))
+    return " OR ".join(f'"{w}"' for w in words) or None
+
+
+class SQLiteHistory:
+    def __init__(self, path: str | os.PathLike, legacy_journal: str | os.PathLike | None = None,
+                 legacy_json: str | os.PathLike | None = None):
+        self.path = Path(path)
+        self.legacy_journal = Path(legacy_journal) if legacy_journal else None
+        self.legacy_json = Path(legacy_json) if legacy_json else None
+        fresh = not self.path.exists()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        if fresh and self.legacy_journal:
+            self._import_journal()
+
+    def _import_journal(self) -> None:
+        from shared.history_journal import HistoryJournal
+
+        # load() itself migrates legacy_json first when the journal does not exist yet
+        journal = HistoryJournal(self.legacy_journal, legacy_json=self.legacy_json)
+        records = journal.load()
+        journal.close()
+        if not records and journal.checkpoint is None:
+            return                                  # nothing stored anywhere yet
+        self.compact(records)
+        if journal.checkpoint is not None:
+            self.save_checkpoint(journal.checkpoint)
+        print(f"Migrated {len(records)} message(s) from {self.legacy_journal} to {self.path}")
+
+    def load(self) -> list[dict]:
+        return [json.loads(r) for (r,) in self.conn.execute("SELECT record FROM messages ORDER BY id")]
+
+    def append(self, record: dict) -> None:
+        with self.conn:
+            self.conn.execute("INSERT INTO messages(content, record) VALUES (?, ?)",
+                              (record["content"], json.dumps(record, ensure_ascii=False)))
+
+    def pop(self) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM messages WHERE id = (SELECT MAX(id) FROM messages)")
+
+    def load_checkpoint(self) -> dict | None:
+        row = self.conn.execute("SELECT record FROM checkpoint WHERE id = 1").fetchone()
+        return json.loads(row[0]) if row else None
+
+    def save_checkpoint(self, checkpoint: dict) -> None:
+        with self.conn:
+            self.conn.execute("INSERT OR REPLACE INTO checkpoint(id, record) VALUES (1, ?)",
+                              (json.dumps(checkpoint, ensure_ascii=False),))
+
+    def compact(self, records: Iterable[dict]) -> None:
+        """Replace the stored history with exactly *records*."""
+        with self.conn:
+            self.conn.execute("DELETE FROM messages")
+            self.conn.executemany(
+                "INSERT INTO messages(content, record) VALUES (?, ?)",
+                ((r["content"], json.dumps(r, ensure_ascii=False)) for r in records),
+            )
+
+    def search(self, query: str, limit: int) -> list[dict]:
+        """Up to *limit* messages sharing words with *query*, best BM25 rank first."""
+        expression = _match_expression(query)
+        if expression is None:
+            return []
+        rows = self.conn.execute(
+            "SELECT m.record FROM messages_fts JOIN messages m ON m.id = messages_fts.rowid "
+            "WHERE messages_fts MATCH ? ORDER BY rank LIMIT ?",
+            (expression, limit),
+        )
+        return [json.loads(r) for (r,) in rows]
+
+    def close(self) -> None:
+        self.conn.close()
@@ -1,4 +1,6 @@
 from shared.newOpenAI import openai
+from shared.embedding_cache import cached_encode
+from shared.chunking import chunk_text
 import os
 from sentence_transformers import SentenceTransformer
 import faiss
@@ -15,18 +17,16 @@ def load_and_chunk_document(file_path = "studyBuddy/week2/Assignment2.1/my_note.
     if not text.strip():
         raise ValueError("The document is empty or contains only whitespace.")
 
-    # Split by paragraphs (double newlines), as generally paragraphs are separated by a line break
-    chunks = text.split('\n\n') # This will split the text into chunks based on paragraphs,its a list of strings
-
-    # Clean and filter chunks
-    chunks = [chunk.strip() for chunk in chunks if len(chunk.strip()) > 10] # Filter out chunks that are too short, it's a list of strings
+    # Pack paragraphs into windows of at most ~200 tiktoken tokens, with some overlap between
+    # neighbouring windows; each chunk is a str that also carries its token count (chunk.tokens)
+    chunks = chunk_text(text)
     return chunks
 
 def generate_embeddings(chunks):
     # Load the embedding model
     embedder = SentenceTransformer('all-MiniLM-L6-v2')
-    # Generate embeddings (returns a list of numpy arrays)
-    embeddings = embedder.encode(chunks, convert_to_numpy=True) # the chunks list is converted to its respective embeddings, which is a numpy array of shape (n_chunks, embedding_dimension)
+    # Generate embeddings, reusing the on-disk cache so only new/edited chunks hit the model
+    embeddings = cached_encode(embedder, chunks, 'all-MiniLM-L6-v2') # numpy array of shape (n_chunks, embedding_dimension)
     return embeddings , embedder
 
 def create_faiss_index(embeddings):
@@ -1,4 +1,8 @@
 import os
+import json
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 import fitz  # PyMuPDF
 import chromadb
 import numpy as np
@@ -7,38 +11,74 @@ from chromadb.config import Settings
 from shared.newOpenAI import openai
 from chromadb import PersistentClient
 
+EMBED_BATCH_SIZE = 256       # chunks per encode() call and per Chroma upsert
+PDF_WORKERS = os.cpu_count() or 1
+MANIFEST_FILE = "pdf_manifest.json"   # {pdf path: file hash} of what the collection holds
+
 # 1. Load and chunk multiple PDF files by paragraph
-def load_and_chunk_pdfs(file_paths):
-    all_chunks = []
-    for path in file_paths:
-        doc = fitz.open(path)  # Open the PDF file
+
+def _file_hash(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            h.update(block)
+    return h.hexdigest()
+
+
+# Runs inside a worker process, so it must be a top-level function
+def _extract_pdf_chunks(path):
+    chunks = []
+    file_hash = _file_hash(path)
+    # the same PDF copied to two paths must not share ids (one upsert would overwrite the other)
+    path_hash = hashlib.sha256(path.encode("utf-8")).hexdigest()[:8]
+    with fitz.open(path) as doc:  # Open the PDF file
         for page_num in range(len(doc)):
             page_text = doc.load_page(page_num).get_text().strip()
             # Split by double newlines (which usually separate paragraphs)
             paragraphs = page_text.split('\n\n')
+            para_num = 0
             for para in paragraphs:
                 para = para.strip()
                 if len(para) > 20:  # Filter out short or empty paragraphs
-                    all_chunks.append({
+                    chunks.append({
+                        # same path + content ⇒ same ids, so re-ingesting is idempotent
+                        "id": f"{path_hash}-{file_hash[:16]}-p{page_num + 1}-c{para_num}",
                         "content": para,
                         "metadata": {
                             "source": os.path.basename(path),
-                            "page": page_num + 1
+                            "page": page_num + 1,
+                            "path": path,
+                            "file_hash": file_hash,
                         }
                     })
-    return all_chunks
+                    para_num += 1
+    return chunks
 
 
-# 2. Generate embeddings using SentenceTransformer
-def generate_embeddings(chunks):
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    texts = [chunk["content"] for chunk in chunks] # Extract text content from chunks, its a list of strings
-    embeddings = embedder.encode(texts, convert_to_numpy=True) #numpy array
-    return embeddings, embedder, texts, [chunk["metadata"] for chunk in chunks]
+def iter_pdf_chunks(file_paths, workers=PDF_WORKERS):
+    """
+    Yield chunks file by file while a process pool extracts the next PDFs.
+    At most 2 × workers files are in flight, so memory stays bounded
+    no matter how many PDFs we ingest.
+    """
+    paths = iter(file_paths)
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = [pool.submit(_extract_pdf_chunks, p) for p in islice(paths, 2 * workers)]
+        while pending:
+            chunks = pending.pop(0).result()      # keep the original file order
+            for path in islice(paths, 1):
+                pending.append(pool.submit(_extract_pdf_chunks, path))
+            yield from chunks
 
-# 3. Create and store vector index using ChromaDB
-def create_chroma_index(texts, embeddings, metadatas, persist_directory="chroma_store"):
 
+def _batched(iterable, size):
+    it = iter(iterable)
+    while batch := list(islice(it, size)):
+        yield batch
+
+
+# 3. Create and store vector index using ChromaDB
+def _fresh_collection(persist_directory):
     chroma_client = PersistentClient(path=persist_directory)
 
     # Check if the collection already exists and delete it if necessary 
@@ -46,14 +86,99 @@ def create_chroma_index(texts, embeddings, metadatas, persist_directory="chroma_
     if "pdf_index" in existing_collections:
         chroma_client.delete_collection("pdf_index")
 
-    collection = chroma_client.create_collection("pdf_index")
+    return chroma_client, chroma_client.create_collection("pdf_index")
+
+
+def _upsert_batch_size(chroma_client, batch_size):
+    # Chroma rejects batches above its own limit
+    max_batch = getattr(chroma_client, "get_max_batch_size", lambda: batch_size)()
+    return min(batch_size, max_batch)
+
+
+def upsert_chunks(chunks, embedder, collection, batch_size=EMBED_BATCH_SIZE):
+    """
+    Embed and upsert *chunks* ({"id", "content", "metadata"} dicts, any
+    iterable) in fixed-size batches; only one batch is held in memory.
+    """
+    count = 0
+    for batch in _batched(chunks, batch_size):
+        texts = [chunk["content"] for chunk in batch]
+        embeddings = embedder.encode(texts, batch_size=batch_size, convert_to_numpy=True)
+        collection.upsert(
+            documents=texts,
+            embeddings=embeddings.tolist(),
+            metadatas=[chunk["metadata"] for chunk in batch],
+            ids=[chunk["id"] for chunk in batch]
+        )
+        count += len(batch)
+    return count
+
+
+def ingest_pdfs(file_paths, embedder, collection, batch_size=EMBED_BATCH_SIZE,
+                workers=PDF_WORKERS):
+    """
+    Streaming pipeline: PDF extraction (process pool) → chunk generator →
+    fixed-size embedding batches → batched Chroma upserts.
+    """
+    count = upsert_chunks(iter_pdf_chunks(file_paths, workers), embedder, collection, batch_size)
+    print(f"Ingested {count} chunks.")
+    return count
+
+
+def _load_manifest(persist_directory):
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(persist_directory, manifest):
+    path = os.path.join(persist_directory, MANIFEST_FILE)
+    with open(path + ".tmp", "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(path + ".tmp", path)
+
 
-    collection.add(
-        documents=texts,
-        embeddings=embeddings.tolist(),
-        metadatas=metadatas,
-        ids=[f"chunk_{i}" for i in range(len(texts))]
-    )
+def sync_chroma_index(file_paths, embedder, persist_directory="chroma_store",
+                      batch_size=EMBED_BATCH_SIZE, workers=PDF_WORKERS):
+    """
+    Keep the persistent `pdf_index` collection in sync with *file_paths*:
+      • unchanged PDFs (same file hash)  → untouched, nothing is embedded
+      • changed PDFs                     → old chunks deleted, file re-ingested
+      • PDFs no longer listed            → their chunks are deleted
+    """
+    chroma_client = PersistentClient(path=persist_directory)
+    collection = chroma_client.get_or_create_collection("pdf_index")
+    batch_size = _upsert_batch_size(chroma_client, batch_size)
+
+    manifest = _load_manifest(persist_directory)
+    if manifest is None:
+        # collection built by the old delete-and-recreate code (chunk_{i} ids)
+        if collection.count():
+            chroma_client, collection = _fresh_collection(persist_directory)
+        manifest = {}
+
+    current = {path: _file_hash(path) for path in file_paths}
+    removed = [p for p in manifest if p not in current]
+    changed = [p for p, h in current.items() if manifest.get(p) != h]
+
+    for path in removed + changed:
+        # unconditional: a crash after the upserts but before the manifest save
+        # leaves chunks of a path the manifest never recorded
+        collection.delete(where={"path": path})
+        manifest.pop(path, None)
+    _save_manifest(persist_directory, manifest)
+
+    if not changed:
+        print(f"PDF index up to date ({collection.count()} chunks) – nothing to embed.")
+        return collection
+
+    ingest_pdfs(changed, embedder, collection, batch_size, workers)
+    # only recorded after the upserts succeed; a crash mid-way re-syncs next run
+    manifest.update({p: current[p] for p in changed})
+    _save_manifest(persist_directory, manifest)
+    print(f"Synced PDFs: {len(changed)} added/changed, {len(removed)} removed.")
     return collection
 
 """ 
@@ -130,9 +255,8 @@ def run_chatbot():
     ]
     
     print("⏳ Loading and embedding PDF files...")
-    chunks = load_and_chunk_pdfs(pdf_files)
-    embeddings, embedder, texts, metadatas = generate_embeddings(chunks)
-    collection = create_chroma_index(texts, embeddings, metadatas)
+    embedder = SentenceTransformer("all-MiniLM-L6-v2")
+    collection = sync_chroma_index(pdf_files, embedder)
 
     print("✅ Chatbot ready. Type your question or 'quit' to exit.")
     
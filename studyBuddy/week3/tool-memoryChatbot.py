@@ -1,4 +1,6 @@
 from shared.newOpenAI import openai
+from shared.embedding_cache import cached_encode
+from shared.chunking import chunk_text
 import os
 from sentence_transformers import SentenceTransformer
 import faiss
@@ -13,12 +15,12 @@ def load_and_chunk_document(file_path="studyBuddy/week3/notes/my_note.md"):
         text = file.read()
     if not text.strip():
         raise ValueError("Document is empty.")
-    chunks = [chunk.strip() for chunk in text.split('\n\n') if len(chunk.strip()) > 10]
+    chunks = chunk_text(text)  # token-bounded windows with overlap, each knows its token count
     return chunks
 
 def generate_embeddings(chunks):
     embedder = SentenceTransformer('all-MiniLM-L6-v2')
-    embeddings = embedder.encode(chunks, convert_to_numpy=True)
+    embeddings = cached_encode(embedder, chunks, 'all-MiniLM-L6-v2')
     return embeddings, embedder
 
 def create_faiss_index(embeddings):
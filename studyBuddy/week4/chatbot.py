@@ -1,8 +1,22 @@
 import os
-import faiss
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from shared.newOpenAI import openai
+from shared.model_registry import get_sentence_model, model_key, model_report
+from shared.embedding_cache import cached_encode, encode_query, query_cache_stats
+from shared.bulk_encode import bulk_encode
+from shared.live_index import LiveNotesIndex
+from shared.ann_index import build_index, set_search_params, DEFAULT_NPROBE, DEFAULT_EF_SEARCH, DEFAULT_RERANK
+from shared.index_bundle import (
+    source_fingerprint, bundle_is_fresh, save_bundle, open_bundle, read_extra,
+)
+from shared.bm25 import BM25Index, reciprocal_rank_fusion
+from shared.chunking import chunk_text, fit_to_budget
+from shared.corpus import CorpusManager
+from shared.retrieval_cache import RetrievalCache, index_version, normalize_query
+from shared.lazy import warm_up, warmup_report
 
 # Tool-chaining API (handles validation + dependency management)
 from tools_chain import run_tool_chain
@@ -12,15 +26,39 @@ from state_management import (
     load_history,
     add_to_history,
     extract_entities,
+    find_mentioned_entities,
     get_entity_context,
     get_optimized_context,
     summarize_history,
-    save_history,
+    pop_last_message,
     conversation_history,
-    entities,
+    encoding,
+    nlp,
 )
 
 USER_LEVEL = "high_school"
+NOTES_FILE = "studyBuddy/week4/notes/my_note.md"
+BUNDLE_DIR = ".rag_bundle/week4_notes"                    # mmap'd index + chunk store
+EMBED_MODEL = "all-MiniLM-L6-v2"
+EMBED_KEY = model_key(EMBED_MODEL)     # cache key; differs per backend (EMBED_BACKEND=onnx-int8)
+WATCH_NOTES = os.getenv("SB_WATCH_NOTES", "0") == "1"   # live re-index on notes edits
+FAISS_BACKEND = os.getenv("SB_FAISS_BACKEND", "auto")    # see shared/ann_index.py
+CORPUS_DIR = os.getenv("SB_CORPUS_DIR")                  # index a whole tree of .md/.pdf instead
+SOURCE_FILTER = os.getenv("SB_SOURCE_FILTER")            # e.g. "week4" – search that shard only
+ENCODE_WORKERS = int(os.getenv("SB_ENCODE_WORKERS", "1"))  # >1: bulk-ingest on that many processes
+DEBUG = os.getenv("SB_DEBUG", "0") == "1"                # print cache stats after every turn
+BM25_FILE = "bm25.json"                                  # sparse index saved in the bundle
+CHUNK_TOKENS = 200             # tiktoken tokens per chunk (see shared/chunking.py)
+CHUNK_OVERLAP = 40
+RAG_TOKEN_BUDGET = 1000        # max note tokens injected into the prompt
+HYBRID_DEPTH = 5               # each leg returns k * HYBRID_DEPTH candidates before fusion
+QUERY_BATCH_SIZE = 64          # questions per encode() forward pass in retrieve_chunks_batch
+
+# dense + sparse legs of hybrid retrieval run side by side
+_retrieval_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="retrieval")
+last_retrieval_ms: dict[str, float] = {}   # per-leg latency of the latest query
+# repeated questions skip encode + search; cleared whenever the index version changes
+_result_cache = RetrievalCache(int(os.getenv("SB_RETRIEVAL_CACHE_SIZE", "256")))
 
 from persona import (
     build_persona_system_prompt,
@@ -28,8 +66,8 @@ from persona import (
 )
 
 #  ░░  RAG core – helper functions
-def load_and_chunk_document(file_path="studyBuddy/week4/notes/my_note.md"):
-    """Load notes and split into non-empty paragraphs."""
+def load_and_chunk_document(file_path=NOTES_FILE):
+    """Load notes and split into token-bounded, overlapping chunks."""
     if not os.path.exists(file_path):
         raise FileNotFoundError(file_path)
 
@@ -39,54 +77,197 @@ def load_and_chunk_document(file_path="studyBuddy/week4/notes/my_note.md"):
     if not text.strip():
         raise ValueError("Document is empty.")
 
-    chunks = [para.strip() for para in text.split("\n\n") if len(para.strip()) > 10]
+    # each chunk carries its token count, so prompt budgeting never re-tokenizes it
+    chunks = chunk_text(text, CHUNK_TOKENS, CHUNK_OVERLAP)
     return chunks
 
 
-def generate_embeddings(chunks):
+def _bulk_encoder(workers=ENCODE_WORKERS):
+    """encode_fn for the embedding cache: None = in-process, else a length-sorted process pool."""
+    return partial(bulk_encode, model_name=EMBED_MODEL, workers=workers) if workers > 1 else None
+
+
+def generate_embeddings(chunks, workers=ENCODE_WORKERS):
     """Create sentence-transformer embeddings for note chunks."""
-    embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    vectors = embedder.encode(chunks, convert_to_numpy=True)
+    embedder = get_sentence_model(EMBED_MODEL)
+    # only new chunks are encoded
+    vectors = cached_encode(embedder, chunks, EMBED_KEY, encode_fn=_bulk_encoder(workers))
     return vectors, embedder
 
 
-def create_faiss_index(embeddings):
-    """Put embeddings into a simple FAISS L2 index."""
-    dimension = embeddings.shape[1]
-    index = faiss.IndexFlatL2(dimension)
-    index.add(embeddings)
-    return index
+def create_faiss_index(embeddings, backend=FAISS_BACKEND, nprobe=DEFAULT_NPROBE,
+                       ef_search=DEFAULT_EF_SEARCH, rerank=DEFAULT_RERANK):
+    """
+    Put embeddings into a FAISS L2 index.
+    backend: "auto" (by corpus size) | "flat" | "hnsw" | "ivf_flat" | "ivf_pq"
+             | "sq_fp16" | "sq_int8"  (quantized storage)
+    rerank:  re-score rerank·k candidates exactly (0 = off)
+    """
+    return build_index(embeddings, backend, nprobe=nprobe, ef_search=ef_search, rerank=rerank)
+
+
+_source_warned = False
+
 
+def _warn_source_ignored(source):
+    # only a CorpusManager (SB_CORPUS_DIR) has shards to route a source filter to
+    global _source_warned
+    if not _source_warned:
+        print(f"SB_SOURCE_FILTER={source!r} ignored: it needs SB_CORPUS_DIR (a sharded corpus)")
+        _source_warned = True
 
-def retrieve_chunks(question, embedder, index, chunks, k=2):
-    """Return top-k relevant note chunks for the question."""
-    question_vec, _ = embedder.encode([question], convert_to_numpy=True), None
-    _, ids = index.search(question_vec, k)
-    return [chunks[i] for i in ids[0]]
 
+def _dense_ids(question, embedder, index, k, source=None):
+    question_vec = encode_query(embedder, question, EMBED_KEY)[None, :]  # shared per-turn memo
+    if source is not None and not isinstance(index, CorpusManager):
+        _warn_source_ignored(source)
+        source = None
+    if source is None:
+        # LiveNotesIndex.search would refresh() again, on the pool thread while the
+        # BM25 leg reads the same chunks; retrieve_chunks already refreshed it
+        searcher = index.index if isinstance(index, LiveNotesIndex) else index
+        _, ids = searcher.search(np.asarray(question_vec, dtype=np.float32), k)
+    else:
+        _, ids = index.search(question_vec, k, source=source)   # CorpusManager shard routing
+    return [int(i) for i in ids[0] if i != -1]   # -1 = fewer than k vectors
+
+
+def _timed_leg(name, fn, *args):
+    start = time.perf_counter()
+    try:
+        return fn(*args)
+    finally:
+        last_retrieval_ms[name] = (time.perf_counter() - start) * 1000
+
+
+def retrieve_chunks(question, embedder, index, chunks, k=2, bm25=None, source=None):
+    """
+    Return top-k relevant note chunks for the question.
+    With a *bm25* index, the dense (FAISS) and sparse (BM25) legs are queried
+    in parallel and merged with reciprocal rank fusion.
+    *source* (a folder or file prefix) restricts a CorpusManager index to the
+    matching shard(s). Results are cached per (normalized question, k, source).
+    """
+    if hasattr(index, "refresh"):
+        # apply notes edits here, once, on the caller thread: the version stamp is
+        # then current and the parallel legs below never race a re-index
+        index.refresh()
+    key = (normalize_query(question), k, source, bm25 is not None)
+    version = index_version(index)
+    cached = _result_cache.get(key, version)
+    if cached is not None:
+        return list(cached)
+
+    results = _retrieve_uncached(question, embedder, index, chunks, k, bm25, source)
+    _result_cache.put(key, version, tuple(results))
+    return results
+
+
+def _retrieve_uncached(question, embedder, index, chunks, k, bm25, source):
+    if bm25 is None:
+        ids = _timed_leg("dense", _dense_ids, question, embedder, index, k, source)
+        return [chunks[i] for i in ids]
+
+    depth = k * HYBRID_DEPTH
+    dense = _retrieval_pool.submit(_timed_leg, "dense", _dense_ids, question, embedder, index,
+                                   depth, source)
+    sparse = _retrieval_pool.submit(_timed_leg, "sparse", bm25.search_ids, question, depth)
+    fused = reciprocal_rank_fusion([dense.result(), sparse.result()])   # per-leg ms: last_retrieval_ms
+    return [chunks[i] for i in fused[:k]]
+
+
+def retrieve_chunks_batch(questions, embedder, index, chunks, k=2):
+    """
+    Batch variant of retrieve_chunks for offline evaluation / bulk question
+    sets: questions are encoded in fixed-size batches (bounded activation
+    memory however many there are) and searched with a single index.search
+    over the whole matrix. Returns one list per question.
+    """
+    questions = list(questions)
+    if not questions:
+        return []
+    question_vecs = embedder.encode(questions, batch_size=QUERY_BATCH_SIZE, convert_to_numpy=True)
+    _, ids = index.search(question_vecs, k)
+    return [[chunks[i] for i in row if i != -1] for row in ids]
+
+
+def load_or_build_index(file_path=NOTES_FILE, bundle_dir=BUNDLE_DIR):
+    """
+    Open the memory-mapped index bundle for *file_path*; rebuild and save it
+    first if the notes, model or backend changed since it was written.
+    Returns (index, chunks, bm25) – chunks is a list-like mmap'd text store,
+    bm25 the sparse index built from the same chunks.
+    """
+    fingerprint = source_fingerprint(file_path, EMBED_KEY, FAISS_BACKEND, DEFAULT_RERANK,
+                                     CHUNK_TOKENS, CHUNK_OVERLAP)
+    if not bundle_is_fresh(bundle_dir, fingerprint):
+        chunks = load_and_chunk_document(file_path)
+        embeddings, _ = generate_embeddings(chunks)
+        bm25 = BM25Index.from_chunks(chunks)
+        save_bundle(bundle_dir, create_faiss_index(embeddings), chunks, fingerprint,
+                    extra_files={BM25_FILE: bm25.to_bytes()})
+    index, chunks = open_bundle(bundle_dir)
+    # the saved index keeps its build-time knobs; apply the current FAISS_NPROBE / FAISS_EF_SEARCH
+    set_search_params(index, nprobe=DEFAULT_NPROBE, ef_search=DEFAULT_EF_SEARCH)
+    raw_bm25 = read_extra(bundle_dir, BM25_FILE)
+    bm25 = BM25Index.from_bytes(raw_bm25) if raw_bm25 else BM25Index.from_chunks(list(chunks))
+    return index, chunks, bm25
+
+
+
+def print_stats():
+    """Model, cache, retrieval-latency and warm-up statistics; shown by /stats, or every turn with SB_DEBUG=1."""
+    print(model_report())           # models load lazily, so this is only meaningful after warm-up
+    print("Query-embedding cache:", query_cache_stats())
+    print("Retrieval cache:", _result_cache.stats())
+    if last_retrieval_ms:
+        legs = " | ".join(f"{leg} {ms:.1f} ms" for leg, ms in last_retrieval_ms.items())
+        print(f"Last retrieval latency: {legs}")
+    print(warmup_report())
 
 
 def run_chatbot():
     """Run the interactive Study Buddy."""
+    # 0. Load spaCy/tiktoken/embedders/Detoxify in the background; the first
+    #    query only waits for the ones it touches that are still loading
+    warm_up(nlp, encoding)
+
     # 1. Load past conversation history
     load_history()
 
     # 2. Build RAG index (if notes file exists)
-    chunks = embedder = index = None
+    chunks = embedder = index = bm25 = None
     try:
-        chunks = load_and_chunk_document()
-        embeddings, embedder = generate_embeddings(chunks)
-        index = create_faiss_index(embeddings)
+        if CORPUS_DIR:
+            # every .md/.pdf under CORPUS_DIR, one shard per folder
+            embedder = get_sentence_model(EMBED_MODEL)
+            index = CorpusManager(CORPUS_DIR, embedder, EMBED_KEY, backend=FAISS_BACKEND,
+                                  encode_fn=_bulk_encoder())
+            chunks = index.chunks
+        elif WATCH_NOTES:
+            # edits to the notes file are diffed and applied before each query
+            chunks = load_and_chunk_document()
+            embeddings, embedder = generate_embeddings(chunks)
+            index = LiveNotesIndex(NOTES_FILE, embedder, EMBED_KEY,
+                                   load_and_chunk_document, chunks, embeddings)
+            chunks, bm25 = index.chunks, index.bm25
+        else:
+            # reuse the on-disk bundle – no chunking/encoding if notes are unchanged;
+            # the embedder itself is fetched at query time (warm-up loads it meanwhile)
+            index, chunks, bm25 = load_or_build_index()
     except Exception as exc:  # noqa: BLE001
         print("RAG disabled:", exc)
 
-    print("Welcome to the Study Buddy!  (type 'quit' to exit)\n")
+    print("Welcome to the Study Buddy!  (type 'quit' to exit, '/stats' for model, cache and warm-up stats)\n")
 
     while True:
         query = input("You: ")
         if query.lower() == "quit":
             print("Goodbye!")
             break
+        if query.strip().lower() == "/stats":
+            print_stats()
+            continue
 
         # 3. Update memory and entity store
         add_to_history("user", query)
@@ -96,10 +277,7 @@ def run_chatbot():
         context = get_optimized_context(query)
 
         # 4-a: Add entity memories if re-mentioned
-        mentioned_entities = [
-            ent for ent in entities.keys()           # every stored entity
-            if ent.lower() in query.lower()          # that appears in the user query   
-            ]
+        mentioned_entities = find_mentioned_entities(query)   # single Aho-Corasick pass
 
         for ent in mentioned_entities:
             entity_context = get_entity_context(ent)
@@ -127,8 +305,10 @@ def run_chatbot():
 
         # 6. Retrieve RAG notes
         rag_notes = ""
-        if chunks and embedder and index:
-            rag_notes = "\n\n".join(retrieve_chunks(query, embedder, index, chunks))
+        if chunks and index:
+            embedder = embedder or get_sentence_model(EMBED_MODEL)
+            notes = retrieve_chunks(query, embedder, index, chunks, bm25=bm25, source=SOURCE_FILTER)
+            rag_notes = "\n\n".join(fit_to_budget(notes, RAG_TOKEN_BUDGET))
 
         #  7. Get final answer via reasoning framework
         answer = reasoned_answer(
@@ -139,13 +319,14 @@ def run_chatbot():
             USER_LEVEL,
         )
         print(f"Assistant: {answer}\n")
+        if DEBUG:
+            print_stats()
 
         # 8. Conditionally store assistant reply
         if "I cannot find the answer in the provided notes or tools" in answer.lower().strip():
             # Remove last user message too
             if conversation_history and conversation_history[-1]["role"] == "user":
-                conversation_history.pop()
-                save_history()
+                pop_last_message()
         else:
             add_to_history("assistant", answer)
 
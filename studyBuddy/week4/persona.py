@@ -51,23 +51,31 @@ DOMAIN_KEYWORDS = {
 }
 
 #  embedding-based detection
-try:
-    from sentence_transformers import SentenceTransformer
-    import numpy as np
+import numpy as np
+from shared.embedding_cache import encode_query
+from shared.lazy import LazyResource
+from shared.model_registry import get_sentence_model, model_key
 
-    _embedder = SentenceTransformer("all-MiniLM-L6-v2")
-    _domain_labels = list(DOMAIN_PROMPTS.keys())  # ⟵ ['computer_science', ...]
-    _domain_vectors = _embedder.encode(_domain_labels, convert_to_numpy=True)
-except Exception:
-    _embedder = None
-    _domain_vectors = None
+_EMBED_MODEL = "all-MiniLM-L6-v2"
+_EMBED_KEY = model_key(_EMBED_MODEL)   # memo key; same as chatbot.EMBED_KEY on every backend
+_domain_labels = list(DOMAIN_PROMPTS.keys())  # ⟵ ['computer_science', ...]
+
+
+def _load_domain_model():
+    embedder = get_sentence_model(_EMBED_MODEL)  # shared with chatbot + reasoning
+    return embedder, embedder.encode(_domain_labels, convert_to_numpy=True)
+
+# (embedder, domain vectors), loaded on first use or by the REPL warm-up
+_domain_model = LazyResource("domain embeddings", _load_domain_model, optional=True)
 
 
 def _domain_by_embedding(query: str) -> str:
-    if _embedder is None:
+    model = _domain_model.get()
+    if model is None:
         print("Embedding model not available, falling back to default domain.")
         return "default"
-    vec = _embedder.encode([query], convert_to_numpy=True)[0]
+    _embedder, _domain_vectors = model
+    vec = encode_query(_embedder, query, _EMBED_KEY)  # memoized: same query is embedded by RAG + scoring
 
     # sims is a vector of cosine similarities between the query and each domain.
     sims = np.dot(_domain_vectors, vec) / (
@@ -84,8 +92,9 @@ def detect_domain(query: str) -> str:
     """Return domain key using embeddings first, then keywords."""
     q_lower = query.lower()
 
-    #1 embedding similarity
-    domain = _domain_by_embedding(q_lower)
+    #1 embedding similarity (MiniLM is uncased, so the raw query shares the
+    #  memoized embedding with retrieval instead of re-encoding q_lower)
+    domain = _domain_by_embedding(query)
     if domain != "default":
         return domain
 
@@ -147,12 +156,12 @@ def build_persona_system_prompt(query: str, user_level: str | None = None) -> st
 #  4.  Ethical Guard-Rails
 
 #1 Try Detoxify → else fallback to rule-based
-try:
+def _load_detoxify():
     from detoxify import Detoxify
 
-    _detox = Detoxify("original-small")
-except Exception:
-    _detox = None
+    return Detoxify("original-small")
+
+_detox = LazyResource("Detoxify original-small", _load_detoxify, optional=True)
 
 SENSITIVE_TERMS = [
     "hate",
@@ -174,8 +183,9 @@ def check_ethical_compliance(text: str) -> Tuple[bool, str]:
     Return (is_compliant, message). Uses Detoxify if available, otherwise
     falls back to simple term/bias checks.
     """
-    if _detox:
-        scores = _detox.predict(text)
+    detox = _detox.get()
+    if detox:
+        scores = detox.predict(text)
         print(f"Detoxify scores: {scores.get('toxicity', 0):.2f}")
         if scores.get("toxicity", 0) > 0.45:
             _log_flag("Detoxify toxicity > 0.4", text)
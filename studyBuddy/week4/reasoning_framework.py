@@ -92,16 +92,27 @@ def self_correct_response(
 
 #  3.  Confidence scoring & selection
 
-from sentence_transformers import SentenceTransformer, util
 import re
 import numpy as np
-
-_embedder = SentenceTransformer("all-MiniLM-L6-v2")
+from shared.model_registry import get_sentence_model, model_key
+from shared.embedding_cache import encode_query
+from shared.lazy import LazyResource
+
+_EMBED_MODEL = "all-MiniLM-L6-v2"
+_EMBED_KEY = model_key(_EMBED_MODEL)   # memo key; same as chatbot.EMBED_KEY on every backend
+# same registry instance persona.py uses; loaded on first use or by the REPL warm-up
+_embedder = LazyResource("confidence embedder", lambda: get_sentence_model(_EMBED_MODEL))
 _VAGUE_PHRASES = re.compile(
     r"(i (am|\'m) not sure|cannot find|no answer|maybe|might be)", re.I
 )
 
 
+def _unit_embedding(text: str) -> np.ndarray:
+    """Normalized embedding via the shared query memo (no re-encode within a turn)."""
+    vec = encode_query(_embedder.get(), text, _EMBED_KEY)
+    return vec / (np.linalg.norm(vec) + 1e-12)
+
+
 def _confidence(
     resp: str,
     query: str,
@@ -121,15 +132,15 @@ def _confidence(
     score = 0.0
 
     #  1-a  answer ↔ query  (25 %)
-    q_emb  = _embedder.encode(query,        convert_to_tensor=True, normalize_embeddings=True)
-    a_emb  = _embedder.encode(resp,         convert_to_tensor=True, normalize_embeddings=True)
-    sim_q  = float(util.cos_sim(q_emb, a_emb)[0][0])
+    q_emb  = _unit_embedding(query)
+    a_emb  = _unit_embedding(resp)
+    sim_q  = float(np.dot(q_emb, a_emb))
     score += 0.25 * max(sim_q, 0.0)
 
     # 1-b  answer ↔ convo-context  (25 %)
     if conv_context:
-        c_emb  = _embedder.encode(conv_context, convert_to_tensor=True, normalize_embeddings=True)
-        sim_c  = float(util.cos_sim(c_emb, a_emb)[0][0])
+        c_emb  = _unit_embedding(conv_context)
+        sim_c  = float(np.dot(c_emb, a_emb))
         score += 0.25 * max(sim_c, 0.0)
 
     # 2  keyword overlap  (25 %)
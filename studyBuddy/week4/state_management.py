@@ -1,63 +1,173 @@
 import os
-import json
 from datetime import datetime
 
-import spacy
-import tiktoken
 from shared.newOpenAI import openai
+from shared.history_journal import HistoryJournal
+from shared.sqlite_history import SQLiteHistory, fts5_available
+from shared.history_index import OverlapIndex
+from shared.history_vectors import HistoryVectorIndex
+from shared.entity_matcher import EntityMatcher
+from shared.model_registry import get_sentence_model, model_key
+from shared.chunking import get_encoding
+from shared.lazy import LazyResource
 
 #   Global config & helpers
 
-nlp          = spacy.load("en_core_web_sm")
-encoding     = tiktoken.encoding_for_model("gpt-3.5-turbo")
+def _load_spacy():
+    import spacy            # importing spaCy alone takes seconds
 
-HISTORY_FILE        = "SBconversation_history.json"
+    return spacy.load("en_core_web_sm")
+
+# loaded on first use / by the REPL's background warm-up, not at import
+encoding     = LazyResource("tiktoken gpt-3.5-turbo", lambda: get_encoding("gpt-3.5-turbo"))
+nlp          = LazyResource("spaCy en_core_web_sm", _load_spacy)
+
+HISTORY_FILE        = "SBconversation_history.jsonl"   # append-only journal (shared/history_journal.py)
+LEGACY_HISTORY_FILE = "SBconversation_history.json"    # old indent=2 file, migrated on first load
+HISTORY_DB          = "SBconversation_history.db"      # SQLite + FTS5 store
+HISTORY_BACKEND     = os.getenv("SB_HISTORY_BACKEND", "journal")   # "journal" | "sqlite"
 MAX_HISTORY_TOKENS  = 3000        # hard ceiling for prompt context
 MAX_RECENT_MESSAGES = 3           # how many latest turns to always try to keep
 MAX_RELEVANT_MSGS   = 3          # max candidates picked via relevance
+MAX_SEMANTIC_MSGS   = 3           # max turns picked via vector memory
+VECTOR_MEMORY       = os.getenv("SB_VECTOR_MEMORY", "1") == "1"   # embed turns for semantic recall
+_EMBED_MODEL        = "all-MiniLM-L6-v2"
 
 conversation_history: list[dict] = []
 entities: dict[str, dict]        = {}
+entity_matcher = EntityMatcher()  # Aho-Corasick over the keys of `entities`
+_total_tokens = 0                 # running sum of every message's stored "tokens"
+
+
+def _open_store():
+    if HISTORY_BACKEND == "sqlite":
+        if fts5_available():
+            # relevance lookups become ranked FTS5 queries instead of a scan
+            return SQLiteHistory(HISTORY_DB, legacy_journal=HISTORY_FILE,
+                                 legacy_json=LEGACY_HISTORY_FILE)
+        print("SQLite build has no FTS5 – keeping the JSONL history journal.")
+    return HistoryJournal(HISTORY_FILE, legacy_json=LEGACY_HISTORY_FILE)
+
+_store = _open_store()       # HistoryJournal or SQLiteHistory – same calls
+# JSON backend: term → message postings, each message tokenized once when added
+# (the SQLite backend answers the same lookup from FTS5, so it gets none)
+_overlap = None if hasattr(_store, "search") else OverlapIndex(conversation_history)
+# every message embedded once into an HNSW index stored next to the history file;
+# opened on the first add/search, and records it backfills a "vid" for are re-saved
+_vectors = HistoryVectorIndex(
+    os.path.splitext(HISTORY_FILE)[0], model_key(_EMBED_MODEL),
+    lambda: get_sentence_model(_EMBED_MODEL),   # same registry instance as RAG / persona
+    on_backfill=lambda: save_history(),
+) if VECTOR_MEMORY else None
 
 
 
 #  Conversation-history persistence
 def load_history() -> None:
-    """Load history from disk (called once at startup)."""
-    global conversation_history
-    if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            conversation_history = json.load(f)
+    """Load the stored history (called once at startup)."""
+    global _total_tokens
+    # in place: chatbot.py holds a reference to this very list
+    conversation_history[:] = _store.load()
+    if _overlap:
+        _overlap.rebuild()
+
+    # records written before token counts were stored get them once, then persisted
+    missing = [m for m in conversation_history if "tokens" not in m]
+    for msg in missing:
+        msg["tokens"] = get_token_count(msg["content"])
+    if _vectors:
+        _vectors.load(conversation_history)   # deferred: nothing is embedded at start-up
+    if missing:
+        save_history()
+    _total_tokens = sum(m["tokens"] for m in conversation_history)
+    _load_checkpoint()
 
 def save_history() -> None:
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(conversation_history, f, indent=2)
+    """Rewrite the store as the current history (compaction)."""
+    _store.compact(conversation_history)
 
 def add_to_history(role: str, content: str) -> None:
-    conversation_history.append(
-        {"role": role, "content": content, "timestamp": datetime.now().isoformat()}
-    )
-    save_history()
+    global _total_tokens
+    message = {
+        "role": role,
+        "content": content,
+        "timestamp": datetime.now().isoformat(),
+        "tokens": get_token_count(content),     # counted once, stored with the record
+    }
+    if _vectors:
+        vid = _vector_call(_vectors.add, content)   # embedded once; the query's vector is memoized
+        if vid is not None:
+            message["vid"] = vid
+            _vectors.bind(vid, len(conversation_history))
+    _total_tokens += message["tokens"]
+    conversation_history.append(message)
+    if _overlap:
+        _overlap.add(message)
+    _store.append(message)          # one appended line / row, not a full rewrite
+
+def pop_last_message() -> dict | None:
+    """Drop the newest message (e.g. an unanswered question) from memory and disk."""
+    global _total_tokens
+    if not conversation_history:
+        return None
+    message = conversation_history.pop()
+    _total_tokens -= message_tokens(message)
+    if _overlap:
+        _overlap.pop()
+    if _vectors and "vid" in message:
+        _vectors.unbind(message["vid"])
+    _store.pop()
+    if _checkpoint["upto"] > len(conversation_history):
+        _checkpoint["upto"] = len(conversation_history)   # already folded into the summary
+        _store.save_checkpoint(_checkpoint)
+    return message
+
+def _vector_call(fn, *args):
+    """Run a vector-memory step; if the embedder is unavailable, turn the memory off."""
+    global _vectors
+    try:
+        return fn(*args)
+    except Exception as exc:  # noqa: BLE001
+        print("Vector memory disabled:", exc)
+        _vectors = None
+        return None
 
 #   Token helpers
 def get_token_count(text: str) -> int:
     """Accurate token count via tiktoken."""
-    return len(encoding.encode(text))
+    return len(encoding.get().encode(text))
 
-#  Relevance search (keyword overlap)
-def get_relevant_history(query: str, max_messages: int = MAX_RELEVANT_MSGS) -> list[dict]:
-    """Return up to *max_messages* past messages scored by word overlap."""
-    query_words   = set(query.lower().split())
-    scored: list[tuple[int, dict]] = []
+def message_tokens(msg: dict) -> int:
+    """Stored token count of a history record (tokenizes only records without one)."""
+    tokens = msg.get("tokens")
+    return tokens if tokens is not None else get_token_count(msg["content"])
 
-    for msg in conversation_history:
-        msg_words = set(msg["content"].lower().split())
-        overlap   = len(query_words & msg_words)
-        if overlap > 0:
-            scored.append((overlap, msg))
+def history_token_total() -> int:
+    """Tokens in the whole history, kept as a running total."""
+    return _total_tokens
 
-    scored.sort(key=lambda x: x[0], reverse=True)
-    return [msg for _, msg in scored[:max_messages]]
+#  Relevance search (keyword overlap / FTS5)
+def get_relevant_history(query: str, max_messages: int = MAX_RELEVANT_MSGS) -> list[dict]:
+    """
+    Return up to *max_messages* past messages scored by word overlap
+    (BM25-ranked FTS5 match with the SQLite backend).
+    """
+    if _overlap is None:
+        return _store.search(query, max_messages)   # indexed FTS5 query
+    # scored from the postings of the query's words, no per-turn re-tokenizing
+    return _overlap.search(query, max_messages)
+
+def get_semantic_history(query: str, max_messages: int = MAX_SEMANTIC_MSGS) -> list[dict]:
+    """
+    Up to *max_messages* older turns closest in meaning to *query* (HNSW
+    top-k over the vector memory), skipping the recent window already in
+    the context.
+    """
+    if not _vectors or not query.strip():
+        return []
+    positions = _vector_call(_vectors.search, query, max_messages + MAX_RECENT_MESSAGES) or []
+    cutoff = len(conversation_history) - MAX_RECENT_MESSAGES
+    return [conversation_history[p] for p in positions if p < cutoff][:max_messages]
 
 
 
@@ -70,15 +180,16 @@ def get_optimized_context(query: str,
     Build a prompt context that includes:
       • last N recent turns        (MAX_RECENT_MESSAGES)
       • top-scoring relevant turns (keyword overlap)
+      • semantically similar turns (vector memory, MAX_SEMANTIC_MSGS)
     De-duplicates by content and trims to *max_total_tokens*.
     """
     recent_msgs   = conversation_history[-MAX_RECENT_MESSAGES:]
-    relevant_msgs = get_relevant_history(query)
+    relevant_msgs = get_relevant_history(query) + get_semantic_history(query)
 
     seen: set[str] = set() # Track unique message content
     combined: list[dict] = []
 
-    # Preserve order: recent first, then relevant
+    # Preserve order: recent first, then relevant (keyword, then semantic)
     for msg in recent_msgs + relevant_msgs:
         if msg["content"] not in seen:
             combined.append(msg)
@@ -88,7 +199,7 @@ def get_optimized_context(query: str,
     total = 0
     final_context: list[dict] = []
     for msg in combined:
-        tok = get_token_count(msg["content"])
+        tok = message_tokens(msg)
         if total + tok <= max_total_tokens:
             final_context.append(msg)
             total += tok
@@ -108,13 +219,19 @@ def get_history_string() -> str:
 #   Entity tracking via spaCy
 def extract_entities(text: str) -> None:
     """Store unseen named entities with minimal context."""
-    doc = nlp(text)
+    doc = nlp.get()(text)
     for ent in doc.ents:
-        entities.setdefault(ent.text, {
-            "type": ent.label_,
-            "context": text,
-            "timestamp": datetime.now().isoformat()
-        })
+        if ent.text not in entities:
+            entities[ent.text] = {
+                "type": ent.label_,
+                "context": text,
+                "timestamp": datetime.now().isoformat()
+            }
+            entity_matcher.add(ent.text)
+
+def find_mentioned_entities(query: str) -> list[str]:
+    """Stored entities mentioned in *query* – one automaton pass, any entity count."""
+    return entity_matcher.find(query)
 
 def get_entity_context(entity: str) -> str:
     return entities.get(entity, {}).get("context", "")
@@ -122,22 +239,72 @@ def get_entity_context(entity: str) -> str:
 
 
 #   Summarisation for very long histories
+#
+# Rolling summary: a checkpoint {"summary", "upto"} covers
+# conversation_history[:upto]. A fold sends only the current summary plus
+# the messages after `upto` (at most SUMMARY_BATCH_TOKENS of them) and
+# stores the merged summary as the next checkpoint, persisted with the
+# history. Each summary is thus a summary of the previous summary and a
+# bounded batch, so a turn costs one bounded call or none at all.
+
+SUMMARY_FOLD_EVERY   = 6          # new messages that trigger the next fold
+SUMMARY_BATCH_TOKENS = 1500       # max message tokens folded in one call
+
+_checkpoint: dict = {"summary": "", "upto": 0}
 
-def summarize_history() -> str:
-    """
-    Abstractive summary if full transcript exceeds ~200 tokens.
-    Returns the raw history if already short.
-    """
-    full_text = " ".join(m["content"] for m in conversation_history)
-    if get_token_count(full_text) < 200:
-        return full_text
+
+def _load_checkpoint() -> None:
+    global _checkpoint
+    saved = _store.load_checkpoint()
+    _checkpoint = saved or {"summary": "", "upto": 0}
+    # a pop can remove messages the checkpoint already covered
+    _checkpoint["upto"] = min(_checkpoint["upto"], len(conversation_history))
+
+
+def _clip(msg: dict, max_tokens: int) -> str:
+    """Message text cut to *max_tokens* (only oversized messages are re-encoded)."""
+    if message_tokens(msg) <= max_tokens:
+        return msg["content"]
+    return encoding.get().decode(encoding.get().encode(msg["content"])[:max_tokens])
+
+
+def _fold_pending() -> None:
+    """Merge the oldest unsummarized batch of messages into the checkpoint."""
+    global _checkpoint
+    batch, used = [], 0
+    for msg in conversation_history[_checkpoint["upto"]:]:
+        tokens = message_tokens(msg)
+        if batch and used + tokens > SUMMARY_BATCH_TOKENS:
+            break
+        batch.append(f"{msg['role']}: {_clip(msg, SUMMARY_BATCH_TOKENS)}")
+        used += min(tokens, SUMMARY_BATCH_TOKENS)
+    if not batch:
+        return
 
     prompt = (
-        "Summarize the following conversation in under 100 words:\n"
-        + full_text
+        "Update the running summary of a conversation with the new messages "
+        "below. Keep the result under 100 words.\n\n"
+        f"Current summary:\n{_checkpoint['summary'] or '(none yet)'}\n\n"
+        "New messages:\n" + "\n".join(batch)
     )
     resp = openai.ChatCompletion.create(
         model="gpt-3.5-turbo",
         messages=[{"role": "user", "content": prompt}]
     )
-    return resp["choices"][0]["message"]["content"]
+    summary = resp["choices"][0]["message"]["content"]
+    _checkpoint = {"summary": summary, "upto": _checkpoint["upto"] + len(batch)}
+    _store.save_checkpoint(_checkpoint)
+
+
+def summarize_history() -> str:
+    """
+    Abstractive summary if full transcript exceeds ~200 tokens.
+    Returns the raw history if already short.
+    """
+    if _total_tokens < 200:          # running total, no re-encode of the transcript
+        return " ".join(m["content"] for m in conversation_history)
+
+    pending = len(conversation_history) - _checkpoint["upto"]
+    if not _checkpoint["summary"] or pending >= SUMMARY_FOLD_EVERY:
+        _fold_pending()              # one bounded call; otherwise reuse the checkpoint
+    return _checkpoint["summary"]